@@ -8,13 +8,31 @@ Creates clean backup excluding heavy folders like node_modules, .next, etc.
 import os
 import sys
 import shutil
-import glob
 import subprocess
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import IO, Dict, Iterator, List, NamedTuple, Tuple, Optional
 import argparse
+import errno
+import gzip
+import hashlib
+import io
+import stat
+import tarfile
+import threading
+import time
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import profiler
+from exclude_matcher import ExcludeMatcher
+from git_index import GitIndexError, list_files
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 
 class Colors:
@@ -26,17 +44,402 @@ class Colors:
     NC = '\033[0m'  # No Color
 
 
+HASH_CHUNK_SIZE = 1024 * 1024
+MAX_REPORTED_ERRORS = 20
+ARCHIVE_FORMATS = ("tar.gz", "tar.zst", "zip")
+# How far an archived mtime may be from the file's: zip keeps 2 s steps, PAX tar a float
+ARCHIVE_MTIME_PRECISION_NS = {"tar.gz": 1_000, "tar.zst": 1_000, "zip": 2_000_000_000}
+HASH_ALGORITHM = "blake2b-128"
+# The manifest holds the small stats record read when listing backups; the
+# per-file checksums are only read by --verify, --restore and --incremental
+BACKUP_META_FILES = ("BACKUP_INFO.txt", "BACKUP_MANIFEST.json", "BACKUP_CHECKSUMS.json")
+
+# Copy mechanisms in order of preference; see ProjectBackup._transfer_file
+FICLONE = 0x40049409  # _IOW(0x94, 9, int) from linux/fs.h
+COPY_MECHANISMS = [
+    mechanism for mechanism, available in (
+        ("reflink", fcntl is not None and sys.platform.startswith("linux")),
+        ("copy_file_range", hasattr(os, "copy_file_range")),
+        ("sendfile", hasattr(os, "sendfile")),
+        ("buffered", True),
+    ) if available
+]
+# Copy the data without hashing it, so the destination has to be read back
+READ_BACK_MECHANISMS = {"copy_file_range", "sendfile"}
+UNSUPPORTED_COPY_ERRNOS = {
+    errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.ENOTTY,
+    errno.EBADF, errno.ENOTSOCK,
+}
+
+
+def kernel_copy(mechanism: str, src_fd: int, dst_fd: int, size: int):
+    """Copy size bytes between file descriptors without going through userspace"""
+    if mechanism == "reflink":
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return
+    
+    offset = 0
+    while offset < size:
+        if mechanism == "copy_file_range":
+            sent = os.copy_file_range(src_fd, dst_fd, size - offset)
+        else:
+            sent = os.sendfile(dst_fd, src_fd, offset, size - offset)
+        if sent == 0:
+            # Source shrank while copying
+            break
+        offset += sent
+
+
+def pid_running(pid: int) -> bool:
+    """True if a process with this pid exists (always assumed on Windows)"""
+    if os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def new_digest():
+    """Create the hash object used for store keys and checksum manifests"""
+    return hashlib.blake2b(digest_size=16)
+
+
+class IndexedFile:
+    """os.DirEntry stand-in for a file enumerated from the git index"""
+    
+    __slots__ = ("name", "path", "_stat")
+    
+    def __init__(self, name: str, path: str, st: os.stat_result):
+        self.name = name
+        self.path = path
+        self._stat = st
+    
+    def stat(self) -> os.stat_result:
+        return self._stat
+
+
+class HashingReader:
+    """File object wrapper that hashes every byte read through it"""
+    
+    def __init__(self, handle: IO[bytes]):
+        self._handle = handle
+        self.digest = new_digest()
+        self.size = 0
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self._handle.read(size)
+        self.digest.update(data)
+        self.size += len(data)
+        return data
+    
+    def hexdigest(self) -> str:
+        return self.digest.hexdigest()
+
+
+def archive_format_for(path: Path) -> Optional[str]:
+    """Return the archive format implied by a backup file name, if any"""
+    for archive_format in ARCHIVE_FORMATS:
+        if path.name.endswith(f".{archive_format}"):
+            return archive_format
+    return None
+
+
+class ArchiveWriter:
+    """Stream files into a tar.gz, tar.zst or zip archive without staging a copy
+    
+    tar.zst uses the zstandard package (or the zstd binary) with one thread
+    per core; tar.gz pipes through pigz when installed and falls back to
+    Python's single-threaded gzip otherwise.
+    """
+    
+    def __init__(self, path: Path, archive_format: str):
+        self.path = path
+        self.format = archive_format
+        self.compressor = "deflate (zipfile)"
+        self._raw: Optional[IO[bytes]] = None
+        self._stream: Optional[IO[bytes]] = None
+        self._process: Optional[subprocess.Popen] = None
+        self._tar: Optional[tarfile.TarFile] = None
+        self._zip: Optional[zipfile.ZipFile] = None
+        
+        if archive_format == "zip":
+            self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+        else:
+            self._raw = open(path, "wb")
+            try:
+                self._stream = self._open_compressor()
+                self._tar = tarfile.open(fileobj=self._stream, mode="w|", format=tarfile.PAX_FORMAT)
+            except BaseException:
+                self.abort()
+                raise
+    
+    def _open_compressor(self) -> IO[bytes]:
+        """Open the fastest available compressor writing to the raw file"""
+        if self.format == "tar.zst":
+            try:
+                import zstandard
+                self.compressor = "zstandard (multi-threaded)"
+                return zstandard.ZstdCompressor(threads=-1).stream_writer(self._raw, closefd=False)
+            except ImportError:
+                pass
+            binary = shutil.which("zstd")
+            if binary is None:
+                raise RuntimeError("tar.zst needs the 'zstandard' Python package or the 'zstd' command")
+            command = [binary, "-q", "-T0", "-c"]
+        else:
+            binary = shutil.which("pigz")
+            if binary is None:
+                self.compressor = "gzip (single-threaded)"
+                return gzip.GzipFile(fileobj=self._raw, mode="wb")
+            command = [binary, "-c"]
+        
+        self.compressor = f"{Path(binary).name} (multi-threaded)"
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=self._raw)
+        return self._process.stdin
+    
+    def add_directory(self, arcname: str, st: os.stat_result):
+        """Add a directory entry so empty directories survive a restore"""
+        if self._zip is not None:
+            info = zipfile.ZipInfo(arcname + "/", datetime.fromtimestamp(st.st_mtime).timetuple()[:6])
+            info.external_attr = ((st.st_mode & 0o7777) | 0o040000) << 16
+            self._zip.writestr(info, b"")
+        else:
+            info = tarfile.TarInfo(arcname)
+            info.type = tarfile.DIRTYPE
+            info.mode = st.st_mode & 0o7777
+            info.mtime = st.st_mtime
+            self._tar.addfile(info)
+    
+    def add_file(self, src_handle: IO[bytes], arcname: str, st: os.stat_result):
+        """Add an already opened file; any failure here leaves the stream unusable"""
+        if self._zip is not None:
+            info = zipfile.ZipInfo(arcname, datetime.fromtimestamp(st.st_mtime).timetuple()[:6])
+            info.external_attr = (st.st_mode & 0o7777 | 0o100000) << 16
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with self._zip.open(info, "w", force_zip64=True) as dst_handle:
+                shutil.copyfileobj(src_handle, dst_handle, HASH_CHUNK_SIZE)
+        else:
+            info = tarfile.TarInfo(arcname)
+            info.size = st.st_size
+            info.mode = st.st_mode & 0o7777
+            info.mtime = st.st_mtime
+            self._tar.addfile(info, src_handle)
+    
+    def add_bytes(self, arcname: str, data: bytes):
+        """Add an in-memory file such as BACKUP_INFO.txt"""
+        st = os.stat_result((0o644, 0, 0, 1, 0, 0, len(data), 0, int(datetime.now().timestamp()), 0))
+        self.add_file(io.BytesIO(data), arcname, st)
+    
+    def close(self):
+        """Finish the archive and wait for any external compressor"""
+        if self._zip is not None:
+            self._zip.close()
+            return
+        
+        self._tar.close()
+        self._stream.close()
+        if self._process is not None:
+            if self._process.wait() != 0:
+                raise RuntimeError(f"Compressor exited with status {self._process.returncode}")
+        self._raw.close()
+    
+    def abort(self):
+        """Give up on a failed archive: stop any compressor and close every handle"""
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+        for handle in (self._zip, self._tar, self._stream, self._raw):
+            if handle is None:
+                continue
+            try:
+                handle.close()
+            except Exception:
+                # The archive is being discarded; a failed flush doesn't matter
+                pass
+        if self._process is not None:
+            self._process.wait()
+
+
+class ArchiveMember(NamedTuple):
+    """A file or directory read back from a backup archive"""
+    name: str
+    is_dir: bool
+    mode: int
+    mtime: float
+    fileobj: Optional[IO[bytes]]
+
+
+def iter_archive_members(path: Path) -> Iterator[ArchiveMember]:
+    """Stream every member of a backup archive in archive order"""
+    archive_format = archive_format_for(path)
+    if archive_format == "zip":
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                mode = (info.external_attr >> 16) & 0o7777 or 0o644
+                mtime = datetime(*info.date_time).timestamp()
+                if info.is_dir():
+                    yield ArchiveMember(info.filename.rstrip("/"), True, mode, mtime, None)
+                else:
+                    with archive.open(info) as member:
+                        yield ArchiveMember(info.filename, False, mode, mtime, member)
+        return
+    
+    process = None
+    with open(path, "rb") as raw:
+        if archive_format == "tar.zst":
+            try:
+                import zstandard
+                stream = zstandard.ZstdDecompressor().stream_reader(raw)
+            except ImportError:
+                process = subprocess.Popen(["zstd", "-q", "-d", "-c"], stdin=raw, stdout=subprocess.PIPE)
+                stream = process.stdout
+        else:
+            stream = gzip.GzipFile(fileobj=raw, mode="rb")
+        
+        try:
+            with tarfile.open(fileobj=stream, mode="r|") as archive:
+                for info in archive:
+                    if info.isdir():
+                        yield ArchiveMember(info.name, True, info.mode, info.mtime, None)
+                    elif info.isfile():
+                        yield ArchiveMember(info.name, False, info.mode, info.mtime, archive.extractfile(info))
+        finally:
+            stream.close()
+            if process is not None:
+                process.wait()
+
+
+def parse_size(value: str) -> int:
+    """Parse a size such as 500M or 20G into bytes (argparse type)"""
+    units = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+    text = value.strip().upper().rstrip("B")
+    unit = text[-1:] if text[-1:] in units else ""
+    try:
+        return int(float(text[:len(text) - len(unit)]) * units[unit])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {value!r}")
+
+
+class RetentionPolicy:
+    """Grandfather-father-son retention over timestamped backups
+    
+    A backup is kept if any rule selects it: the newest keep_last backups,
+    plus the newest backup of each of the last keep_hourly hours,
+    keep_daily days, keep_weekly ISO weeks and keep_monthly months that
+    have backups. If max_total_bytes is set, the oldest kept backups are
+    then dropped until the total fits (the newest is always kept).
+    Backups whose timestamp can't be parsed are never deleted.
+    """
+    
+    BUCKETS = (
+        ("hourly", lambda ts: ts.strftime("%Y%m%d%H")),
+        ("daily", lambda ts: ts.strftime("%Y%m%d")),
+        ("weekly", lambda ts: "%d-W%02d" % ts.isocalendar()[:2]),
+        ("monthly", lambda ts: ts.strftime("%Y%m")),
+    )
+    
+    def __init__(self, keep_last: int = 10, keep_hourly: int = 0, keep_daily: int = 0,
+                 keep_weekly: int = 0, keep_monthly: int = 0, max_total_bytes: Optional[int] = None):
+        self.keep_last = keep_last
+        self.keep_counts = {
+            "hourly": keep_hourly,
+            "daily": keep_daily,
+            "weekly": keep_weekly,
+            "monthly": keep_monthly,
+        }
+        self.max_total_bytes = max_total_bytes
+    
+    def has_keep_rule(self) -> bool:
+        """Without one, plan() would remove every dated backup"""
+        return bool(self.keep_last) or any(self.keep_counts.values())
+    
+    def describe(self) -> str:
+        if not self.has_keep_rule():
+            return "keeping only undated backups"
+        rules = [f"last {self.keep_last}"] if self.keep_last else []
+        rules.extend(f"{count} {kind}" for kind, count in self.keep_counts.items() if count)
+        if self.max_total_bytes is not None:
+            rules.append(f"at most {ProjectBackup._format_bytes(self.max_total_bytes)}")
+        return "keeping " + ", ".join(rules)
+    
+    def plan(self, backups: List[Tuple[Path, Optional[datetime], int]]) -> Tuple[Dict[Path, List[str]], List[Path]]:
+        """Split (path, timestamp, size) entries into ({kept path: reasons}, [paths to remove])"""
+        dated = sorted((b for b in backups if b[1] is not None), key=lambda b: b[1], reverse=True)
+        keep: Dict[Path, List[str]] = {path: ["undated"] for path, ts, _ in backups if ts is None}
+        
+        for path, _, _ in dated[:self.keep_last]:
+            keep.setdefault(path, []).append("last")
+        
+        for kind, bucket_of in self.BUCKETS:
+            seen = set()
+            for path, ts, _ in dated:
+                if len(seen) >= self.keep_counts[kind]:
+                    break
+                bucket = bucket_of(ts)
+                if bucket not in seen:
+                    seen.add(bucket)
+                    keep.setdefault(path, []).append(kind)
+        
+        if self.max_total_bytes is not None:
+            sizes = {path: size for path, _, size in backups}
+            total = sum(sizes[path] for path in keep)
+            for path, _, _ in reversed(dated[1:]):
+                if total <= self.max_total_bytes:
+                    break
+                if path in keep and "undated" not in keep[path]:
+                    total -= sizes[path]
+                    del keep[path]
+        
+        remove = [path for path, _, _ in dated if path not in keep]
+        return keep, remove
+
+
 class ProjectBackup:
     """Main backup class for FIGDREAM project"""
     
-    def __init__(self, project_root: str = None):
+    def __init__(self, project_root: str = None, incremental: bool = False, backend: str = "tree",
+                 jobs: int = 1, archive_format: str = "dir",
+                 retention: Optional[RetentionPolicy] = None, dry_run: bool = False,
+                 from_git: bool = False, kernel_copy: bool = False):
         self.project_root = Path(project_root or os.getcwd()).resolve()
         self.project_name = self.project_root.name
         self.backup_base_dir = self.project_root.parent
         self.exclude_patterns = self._get_exclude_patterns()
+        self.exclude_matcher = ExcludeMatcher(self.exclude_patterns)
+        self.incremental = incremental
+        self.backend = backend
+        self.archive_format = archive_format
+        self.retention = retention or RetentionPolicy()
+        self.dry_run = dry_run
+        self.from_git = from_git
+        self.kernel_copy = kernel_copy
+        self.store_dir = self.backup_base_dir / f"{self.project_name}_store"
+        self.objects_dir = self.store_dir / "objects"
+        self.store_tmp_dir = self.store_dir / "tmp"
+        self.manifests_dir = self.store_dir / "manifests"
+        self.link_dest: Optional[Path] = None
+        self.jobs = max(1, jobs)
+        self.linked_files = 0
+        self.copied_files = 0
+        self.copy_errors: List[Tuple[Path, Exception]] = []
+        self.file_checksums: Dict[str, Dict] = {}
+        self.copy_mechanism_by_fs: Dict[Tuple[int, int], str] = {}
+        self.copy_mechanism_counts: Dict[str, int] = {}
+        self.copied_bytes = 0
+        self.copy_seconds = 0.0
+        self.link_dest_checksums: Dict[str, Dict] = {}
+        self.stats: Dict[str, int] = self._new_stats()
+        self._stats_lock = threading.Lock()
         
     def _get_exclude_patterns(self) -> List[str]:
-        """Define folders and files to exclude from backup"""
+        """Define folders and files to exclude from backup
+        
+        Patterns use .gitignore semantics (see exclude_matcher): plain names
+        match at any depth, patterns containing a slash are root-anchored.
+        """
         return [
             # Dependencies and build artifacts
             "node_modules",
@@ -45,6 +448,9 @@ class ProjectBackup:
             "build",
             ".turbo",
             
+            # fresh-install.py --background-delete trash
+            ".fresh-install-trash",
+            
             # Cache directories
             ".cache",
             ".npm",
@@ -104,103 +510,865 @@ class ProjectBackup:
         """Create backup folder name"""
         return f"{self.project_name}_backup_{timestamp}"
     
-    def _get_source_size_mb(self) -> int:
-        """Calculate approximate source size in MB"""
+    def _parse_backup_timestamp(self, backup_path: Path) -> Optional[datetime]:
+        """Recover the timestamp _create_backup_name encoded in a backup's name"""
+        prefix = self._create_backup_name("")
+        stem = self._backup_stem(backup_path)
+        if not stem.startswith(prefix):
+            return None
         try:
-            result = subprocess.run(
-                ["du", "-sk", str(self.project_root)],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            size_kb = int(result.stdout.split()[0])
-            return size_kb // 1024
-        except (subprocess.CalledProcessError, ValueError, IndexError):
-            return 0
+            return datetime.strptime(stem[len(prefix):], "%Y%m%d_%H%M%S")
+        except ValueError:
+            return None
     
-    def _should_exclude(self, path: Path, relative_path: Path) -> bool:
-        """Check if path should be excluded from backup"""
-        path_str = str(relative_path)
+    def _list_backups(self) -> List[Path]:
+        """List tree and archive backups of this project"""
+        return [
+            backup_path
+            for backup_path in self.backup_base_dir.glob(self._create_backup_name("*"))
+            if backup_path.is_dir() or archive_format_for(backup_path)
+        ]
+    
+    def _find_latest_backup(self, exclude_name: str) -> Optional[Path]:
+        """Find the newest existing backup directory (names sort by timestamp)"""
+        backups = [
+            backup_path for backup_path in self._list_backups()
+            if backup_path.is_dir() and backup_path.name != exclude_name
+        ]
+        return max(backups, key=lambda x: x.name, default=None)
+    
+    def _link_if_unchanged(self, src_stat: os.stat_result, ref_file: Path, dst_file: Path) -> bool:
+        """Hard-link dst_file to ref_file when the source has the same size and mtime"""
+        try:
+            ref_stat = ref_file.stat()
+        except OSError:
+            return False
         
-        # Check exact matches and patterns
-        for pattern in self.exclude_patterns:
-            # Handle glob patterns
-            if '*' in pattern:
-                if pattern.endswith('*'):
-                    prefix = pattern[:-1]
-                    if path_str.startswith(prefix):
-                        return True
-                elif pattern.startswith('*'):
-                    suffix = pattern[1:]
-                    if path_str.endswith(suffix):
-                        return True
+        if (src_stat.st_size != ref_stat.st_size or
+                src_stat.st_mtime_ns != ref_stat.st_mtime_ns):
+            return False
+        
+        try:
+            os.link(ref_file, dst_file)
+            return True
+        except OSError:
+            # Different filesystem or link limit reached - fall back to copying
+            return False
+    
+    @staticmethod
+    def _new_stats() -> Dict[str, int]:
+        """Size statistics gathered while walking the source tree"""
+        return {
+            "included_files": 0,
+            "included_dirs": 0,
+            "included_bytes": 0,
+            "excluded_files": 0,
+            "excluded_dirs": 0,
+            "excluded_bytes": 0,
+        }
+    
+    @staticmethod
+    def _format_bytes(size: int) -> str:
+        """Format a byte count the way du -h does"""
+        value = float(size)
+        for unit in ['B', 'K', 'M', 'G']:
+            if value < 1024:
+                return f"{value:.0f}{unit}" if unit == 'B' else f"{value:.1f}{unit}"
+            value /= 1024
+        return f"{value:.1f}T"
+    
+    def _should_exclude(self, relative_path: str, is_dir: bool) -> bool:
+        """Check if a root-relative POSIX path should be excluded from backup"""
+        return self.exclude_matcher.matches(relative_path, is_dir)
+    
+    def _walk_with_exclusions(self, src: Path) -> Iterator[Tuple[Path, Path, List[str], List[os.DirEntry]]]:
+        """Walk src top-down yielding (root, relative root, dir names, file entries)
+        
+        Exclusions are applied and self.stats is filled in during the same
+        scandir pass. Excluded directories are counted but never descended
+        into, so node_modules costs one directory entry rather than a rescan.
+        Like os.walk, symlinked directories are listed but not followed.
+        """
+        if self.from_git:
+            yield from self._walk_git_listing(src)
+            return
+        
+        stack: List[Tuple[Path, Path]] = [(src, Path("."))]
+        while stack:
+            root_path, relative_root = stack.pop()
+            rel_prefix = "" if relative_root == Path(".") else relative_root.as_posix() + "/"
+            
+            try:
+                with os.scandir(root_path) as iterator:
+                    entries = list(iterator)
+            except OSError as e:
+                self._record_copy_error(relative_root, e)
+                continue
+            
+            dirs: List[str] = []
+            files: List[os.DirEntry] = []
+            descend: List[str] = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                
+                if self._should_exclude(rel_prefix + entry.name, is_dir):
+                    if is_dir:
+                        self.stats["excluded_dirs"] += 1
+                    else:
+                        self.stats["excluded_files"] += 1
+                        self.stats["excluded_bytes"] += self._entry_size(entry)
+                elif is_dir:
+                    dirs.append(entry.name)
+                    self.stats["included_dirs"] += 1
+                    if not entry.is_symlink():
+                        descend.append(entry.name)
                 else:
-                    # More complex glob pattern
-                    if glob.fnmatch.fnmatch(path_str, pattern):
-                        return True
+                    files.append(entry)
+                    self.stats["included_files"] += 1
+                    self.stats["included_bytes"] += self._entry_size(entry)
+            
+            profiler.count("files walked", len(files))
+            yield root_path, relative_root, dirs, files
+            
+            # Reverse so subdirectories are visited in listing order
+            for dir_name in reversed(descend):
+                stack.append((root_path / dir_name, relative_root / dir_name))
+    
+    def _walk_git_listing(self, src: Path) -> Iterator[Tuple[Path, Path, List[str], List[IndexedFile]]]:
+        """Same contract as _walk_with_exclusions, fed from the git index
+        
+        Only tracked files still on disk and untracked files git does not
+        ignore are visited, so node_modules and .next are never listed.
+        Exclude patterns still apply on top. Directories are derived from
+        file paths, which means empty directories are not backed up.
+        """
+        try:
+            rel_paths = list_files(src)
+        except GitIndexError as e:
+            self._record_copy_error(Path("."), e)
+            return
+        self._print_colored(f"📇 Listed {len(rel_paths)} files from the git index", Colors.BLUE)
+        
+        # relative dir -> (subdirectory names, files); None marks excluded dirs
+        tree: Dict[str, Optional[Tuple[List[str], List[IndexedFile]]]] = {"": ([], [])}
+        
+        def visible_dir(rel_dir: str) -> bool:
+            if rel_dir in tree:
+                return tree[rel_dir] is not None
+            parent, _, name = rel_dir.rpartition("/")
+            if not visible_dir(parent):
+                tree[rel_dir] = None
+                return False
+            if self._should_exclude(rel_dir, True):
+                self.stats["excluded_dirs"] += 1
+                tree[rel_dir] = None
+                return False
+            tree[parent][0].append(name)
+            tree[rel_dir] = ([], [])
+            self.stats["included_dirs"] += 1
+            return True
+        
+        for rel_path in rel_paths:
+            parent, _, name = rel_path.rpartition("/")
+            try:
+                file_stat = os.stat(src / rel_path)
+            except OSError as e:
+                self._record_copy_error(Path(rel_path), e)
+                continue
+            if not visible_dir(parent) or self._should_exclude(rel_path, False):
+                self.stats["excluded_files"] += 1
+                self.stats["excluded_bytes"] += file_stat.st_size
+            elif stat.S_ISDIR(file_stat.st_mode):
+                # A tracked symlink to a directory: listed, not followed
+                tree[parent][0].append(name)
+                self.stats["included_dirs"] += 1
             else:
-                # Exact match or directory match
-                if (path_str == pattern or 
-                    path_str.startswith(pattern + "/") or 
-                    path_str.startswith(pattern + os.sep)):
-                    return True
+                tree[parent][1].append(IndexedFile(name, str(src / rel_path), file_stat))
+                self.stats["included_files"] += 1
+                self.stats["included_bytes"] += file_stat.st_size
         
-        return False
+        stack = [""]
+        while stack:
+            rel_dir = stack.pop()
+            dirs, files = tree[rel_dir]
+            relative_root = Path(rel_dir) if rel_dir else Path(".")
+            profiler.count("files walked", len(files))
+            profiler.count("syscalls avoided")  # no scandir for this directory
+            yield src / relative_root, relative_root, dirs, files
+            for dir_name in reversed(dirs):
+                child = f"{rel_dir}/{dir_name}" if rel_dir else dir_name
+                if tree.get(child) is not None:
+                    stack.append(child)
+    
+    @staticmethod
+    def _entry_size(entry: os.DirEntry) -> int:
+        """Size of a directory entry (following symlinks like shutil.copy2)"""
+        try:
+            return entry.stat().st_size
+        except OSError:
+            return 0
+    
+    def _copy_file(self, entry: os.DirEntry, relative_file: Path, dst_file: Path,
+                   link_dest: Optional[Path]):
+        """Copy (or hard-link) a single file; safe to call from worker threads
+        
+        Copied files are hashed from the same buffers that are written, so
+        recording the checksum costs no extra read.
+        """
+        src_file = Path(entry.path)
+        relative_posix = relative_file.as_posix()
+        linked = link_dest is not None and self._link_if_unchanged(
+            entry.stat(), link_dest / relative_file, dst_file
+        )
+        if linked:
+            digest, size = self._linked_checksum(relative_posix, dst_file)
+        else:
+            # Equivalent to shutil.copy2, but through the fastest copy mechanism
+            digest, size, mechanism = self._transfer_file(src_file, dst_file)
+            shutil.copystat(src_file, dst_file)
+        
+        with self._stats_lock:
+            self.file_checksums[relative_posix] = {"hash": digest, "size": size}
+            if linked:
+                self.linked_files += 1
+            else:
+                self.copied_files += 1
+                self.copied_bytes += size
+                self.copy_mechanism_counts[mechanism] = self.copy_mechanism_counts.get(mechanism, 0) + 1
+        if linked:
+            profiler.count("files hard-linked")
+        else:
+            profiler.count("bytes copied", size)
     
-    def _copy_with_exclusions(self, src: Path, dst: Path) -> bool:
-        """Copy directory with exclusions using Python"""
+    def _transfer_file(self, src_file: Path, dst_file: Path) -> Tuple[str, int, str]:
+        """Copy file contents, returning (hash, size, mechanism used)
+        
+        Tries FICLONE reflinks (btrfs/XFS) and falls back to a buffered copy
+        that hashes the bytes as it writes them, so either way each file is
+        read once. copy_file_range and sendfile never pass the data through
+        Python, so the checksum needs a second read of the destination; they
+        are only tried with kernel_copy (--kernel-copy), which pays off when
+        the filesystem offloads the copy (e.g. NFS server-side copy). The
+        first mechanism that works for a (source, destination) filesystem
+        pair is remembered, so unsupported ones are only probed once.
+        """
+        with open(src_file, 'rb') as src_handle, open(dst_file, 'wb') as dst_handle:
+            src_stat = os.fstat(src_handle.fileno())
+            fs_key = (src_stat.st_dev, os.fstat(dst_handle.fileno()).st_dev)
+            
+            mechanisms = [
+                mechanism for mechanism in COPY_MECHANISMS
+                if self.kernel_copy or mechanism not in READ_BACK_MECHANISMS
+            ]
+            cached = self.copy_mechanism_by_fs.get(fs_key)
+            if cached in mechanisms:
+                mechanisms = mechanisms[mechanisms.index(cached):]
+            if src_stat.st_size == 0:
+                mechanisms = ["buffered"]
+            
+            for mechanism in mechanisms:
+                if mechanism == "buffered":
+                    if src_stat.st_size:
+                        # Nothing faster works here; stop probing this filesystem pair
+                        with self._stats_lock:
+                            self.copy_mechanism_by_fs[fs_key] = mechanism
+                    digest, size = self._hash_stream(src_handle, dst_handle)
+                    return digest, size, mechanism
+                try:
+                    kernel_copy(mechanism, src_handle.fileno(), dst_handle.fileno(), src_stat.st_size)
+                except OSError as e:
+                    if e.errno not in UNSUPPORTED_COPY_ERRNOS:
+                        raise
+                    # Not supported here: undo any partial copy and try the next one
+                    dst_handle.truncate(0)
+                    dst_handle.seek(0)
+                    src_handle.seek(0)
+                    continue
+                with self._stats_lock:
+                    self.copy_mechanism_by_fs[fs_key] = mechanism
+                break
+        
+        digest, size = self._hash_file(dst_file)
+        return digest, size, mechanism
+    
+    def _linked_checksum(self, relative_file: str, linked_file: Path) -> Tuple[str, int]:
+        """Checksum of a hard-linked file, reused from the previous manifest when possible"""
+        size = linked_file.stat().st_size
+        previous = self.link_dest_checksums.get(relative_file)
+        if previous is not None and previous["size"] == size:
+            return previous["hash"], size
+        return self._hash_file(linked_file)
+    
+    def _record_copy_error(self, relative_path: Path, error: Exception):
+        """Remember a per-file failure so it can be reported with the others"""
+        with self._stats_lock:
+            self.copy_errors.append((relative_path, error))
+    
+    def _report_copy_errors(self):
+        """Print all per-file copy failures together"""
+        self._print_colored(f"❌ {len(self.copy_errors)} files could not be copied:", Colors.RED)
+        for relative_path, error in self.copy_errors[:MAX_REPORTED_ERRORS]:
+            self._print_colored(f"  {relative_path}: {error}", Colors.RED)
+        if len(self.copy_errors) > MAX_REPORTED_ERRORS:
+            self._print_colored(f"  ... and {len(self.copy_errors) - MAX_REPORTED_ERRORS} more", Colors.RED)
+    
+    def _copy_with_exclusions(self, src: Path, dst: Path, link_dest: Optional[Path] = None) -> bool:
+        """Copy directory with exclusions using Python
+        
+        When link_dest is given, files whose size and mtime match the copy in
+        link_dest are hard-linked instead of copied (rsync --link-dest style).
+        With jobs > 1 the tree is still walked once, but file copies go to a
+        bounded thread pool; each directory is created before any file in it
+        is submitted. Per-file errors are collected instead of aborting.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.jobs) if self.jobs > 1 else None
+        # Bound queued copies so a huge tree doesn't pile up pending futures
+        slots = threading.BoundedSemaphore(self.jobs * 4)
+        
+        def on_done(future: Future, relative_file: Path):
+            slots.release()
+            error = future.exception()
+            if error is not None:
+                self._record_copy_error(relative_file, error)
+        
+        start = time.perf_counter()
         try:
             dst.mkdir(parents=True, exist_ok=True)
             
-            for root, dirs, files in os.walk(src):
-                root_path = Path(root)
-                relative_root = root_path.relative_to(src)
-                
-                # Filter directories to exclude
-                dirs[:] = [d for d in dirs if not self._should_exclude(
-                    root_path / d, relative_root / d
-                )]
-                
+            for root_path, relative_root, dirs, files in self._walk_with_exclusions(src):
                 # Create directories
                 for dir_name in dirs:
-                    src_dir = root_path / dir_name
                     dst_dir = dst / relative_root / dir_name
-                    if not dst_dir.exists():
+                    try:
                         dst_dir.mkdir(parents=True, exist_ok=True)
+                    except OSError as e:
+                        self._record_copy_error(relative_root / dir_name, e)
                 
                 # Copy files
-                for file_name in files:
-                    src_file = root_path / file_name
-                    relative_file = relative_root / file_name
+                for entry in files:
+                    relative_file = relative_root / entry.name
+                    dst_file = dst / relative_file
                     
-                    if not self._should_exclude(src_file, relative_file):
-                        dst_file = dst / relative_file
-                        dst_file.parent.mkdir(parents=True, exist_ok=True)
-                        shutil.copy2(src_file, dst_file)
-            
-            return True
+                    if executor is None:
+                        try:
+                            self._copy_file(entry, relative_file, dst_file, link_dest)
+                        except (OSError, shutil.Error) as e:
+                            self._record_copy_error(relative_file, e)
+                        continue
+                    
+                    slots.acquire()
+                    future = executor.submit(self._copy_file, entry, relative_file, dst_file, link_dest)
+                    future.add_done_callback(lambda f, rel=relative_file: on_done(f, rel))
         except Exception as e:
             self._print_colored(f"❌ Error during copy: {e}", Colors.RED)
             return False
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+            self.copy_seconds = time.perf_counter() - start
+        
+        if self.copy_errors:
+            self._report_copy_errors()
+            return False
+        return True
+    
+    def _hash_file(self, path: Path, copy_to: Optional[Path] = None) -> Tuple[str, int]:
+        """Hash file contents, optionally writing the bytes to copy_to
+        
+        Returns (hex digest, number of bytes read).
+        """
+        with open(path, 'rb') as src_handle:
+            if copy_to is None:
+                return self._hash_stream(src_handle)
+            with open(copy_to, 'wb') as dst_handle:
+                return self._hash_stream(src_handle, dst_handle)
     
-    def _get_backup_size_mb(self, backup_path: Path) -> int:
-        """Calculate backup size in MB"""
+    @staticmethod
+    def _hash_stream(src_handle: IO[bytes], dst_handle: Optional[IO[bytes]] = None) -> Tuple[str, int]:
+        """Hash a stream to EOF, copying it to dst_handle when given"""
+        digest = new_digest()
+        size = 0
+        while True:
+            chunk = src_handle.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+            if dst_handle is not None:
+                dst_handle.write(chunk)
+        return digest.hexdigest(), size
+    
+    def _object_path(self, digest: str) -> Path:
+        """Location of an object in the content-addressed store"""
+        return self.objects_dir / digest[:2] / digest[2:]
+    
+    def _store_object(self, src_file: Path) -> Tuple[str, int]:
+        """Add file contents to the store, returning (hash, bytes newly written)
+        
+        Only files that changed since the last snapshot get here, so they are
+        copied to a temporary object while hashing and deduplicated
+        afterwards: one read per file instead of hashing the source first.
+        """
+        # Hash the bytes actually written so a file changing mid-backup
+        # can never end up stored under the wrong key
+        tmp_path = self.store_tmp_dir / f"tmp-{os.getpid()}-{threading.get_ident()}"
+        digest, written, _ = self._transfer_file(src_file, tmp_path)
+        object_path = self._object_path(digest)
+        if object_path.exists():
+            tmp_path.unlink()
+            return digest, 0
+        
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, object_path)
+        return digest, written
+    
+    def _list_manifests(self) -> List[Path]:
+        """List store manifests, newest first (names sort by timestamp)"""
+        if not self.manifests_dir.is_dir():
+            return []
+        return sorted(self.manifests_dir.glob("*.json"), key=lambda x: x.name, reverse=True)
+    
+    def _load_manifest(self, manifest_path: Path) -> Optional[Dict]:
+        """Load a store manifest, returning None if it is unreadable"""
         try:
-            result = subprocess.run(
-                ["du", "-sk", str(backup_path)],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            size_kb = int(result.stdout.split()[0])
-            return size_kb // 1024
-        except (subprocess.CalledProcessError, ValueError, IndexError):
+            with open(manifest_path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            self._print_colored(f"❌ Could not read manifest {manifest_path.name}: {e}", Colors.RED)
+            return None
+    
+    def _store_with_exclusions(self, src: Path, backup_name: str) -> Optional[Dict]:
+        """Write the filtered tree into the object store and return its manifest"""
+        previous_files: Dict[str, Dict] = {}
+        manifests = self._list_manifests()
+        if manifests:
+            previous = self._load_manifest(manifests[0])
+            if previous:
+                previous_files = previous.get("files", {})
+        
+        manifest = {
+            "backup_name": backup_name,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "project_root": str(self.project_root),
+            "dirs": [],
+            "files": {},
+            "logical_bytes": 0,
+            "stored_bytes": 0,
+        }
+        
+        try:
+            self.objects_dir.mkdir(parents=True, exist_ok=True)
+            self.store_tmp_dir.mkdir(parents=True, exist_ok=True)
+            self.manifests_dir.mkdir(parents=True, exist_ok=True)
+            
+            for root_path, relative_root, dirs, files in self._walk_with_exclusions(src):
+                for dir_name in dirs:
+                    manifest["dirs"].append((relative_root / dir_name).as_posix())
+                
+                for entry in files:
+                    src_file = Path(entry.path)
+                    relative_file = (relative_root / entry.name).as_posix()
+                    file_stat = entry.stat()
+                    
+                    # Unchanged since the last snapshot: reuse its hash without reading
+                    previous_entry = previous_files.get(relative_file)
+                    if (previous_entry and
+                            previous_entry["size"] == file_stat.st_size and
+                            previous_entry["mtime_ns"] == file_stat.st_mtime_ns and
+                            self._object_path(previous_entry["hash"]).exists()):
+                        digest = previous_entry["hash"]
+                        self.linked_files += 1
+                        profiler.count("files unchanged")
+                    else:
+                        digest, written = self._store_object(src_file)
+                        manifest["stored_bytes"] += written
+                        self.copied_files += 1
+                        profiler.count("bytes stored", written)
+                    
+                    manifest["files"][relative_file] = {
+                        "hash": digest,
+                        "size": file_stat.st_size,
+                        "mode": file_stat.st_mode & 0o7777,
+                        "mtime_ns": file_stat.st_mtime_ns,
+                    }
+                    manifest["logical_bytes"] += file_stat.st_size
+            
+        except Exception as e:
+            self._print_colored(f"❌ Error during store: {e}", Colors.RED)
+            return None
+        
+        if self.copy_errors:
+            self._report_copy_errors()
+            return None
+        
+        manifest["stats"] = dict(self.stats)
+        return manifest
+    
+    def _write_manifest(self, manifest: Dict) -> Path:
+        """Atomically write a manifest into the store"""
+        manifest_path = self.manifests_dir / f"{manifest['backup_name']}.json"
+        tmp_path = manifest_path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+        return manifest_path
+    
+    def _verify_store_backup(self, manifest: Dict) -> bool:
+        """Verify every object referenced by a manifest exists with the right size"""
+        self._print_colored("\n🔍 Verifying backup integrity...", Colors.BLUE)
+        
+        missing = 0
+        for relative_file, entry in manifest["files"].items():
+            object_path = self._object_path(entry["hash"])
+            try:
+                if object_path.stat().st_size == entry["size"]:
+                    continue
+            except OSError:
+                pass
+            self._print_colored(f"❌ {relative_file} (object {entry['hash']} missing or truncated)", Colors.RED)
+            missing += 1
+        
+        if missing:
+            return False
+        self._print_colored(f"✅ {len(manifest['files'])} files present in store", Colors.GREEN)
+        return True
+    
+    def _collect_garbage(self) -> Tuple[int, int]:
+        """Delete objects no longer referenced by any manifest
+        
+        Temporary objects left behind by interrupted runs are deleted too,
+        once the process that wrote them is gone.
+        """
+        referenced = set()
+        for manifest_path in self._list_manifests():
+            manifest = self._load_manifest(manifest_path)
+            if manifest is None:
+                # Never delete objects while a manifest can't be read
+                return 0, 0
+            referenced.update(entry["hash"] for entry in manifest["files"].values())
+        
+        removed = 0
+        freed = 0
+        if self.store_tmp_dir.is_dir():
+            for tmp_path in self.store_tmp_dir.glob("tmp-*"):
+                try:
+                    pid = int(tmp_path.name.split("-")[1])
+                except (IndexError, ValueError):
+                    continue
+                if pid_running(pid):
+                    continue
+                freed += tmp_path.stat().st_size
+                tmp_path.unlink()
+                removed += 1
+        
+        if not self.objects_dir.is_dir():
+            return removed, freed
+        
+        for fan_out_dir in self.objects_dir.iterdir():
+            if not fan_out_dir.is_dir():
+                continue
+            for object_path in fan_out_dir.iterdir():
+                if fan_out_dir.name + object_path.name in referenced:
+                    continue
+                freed += object_path.stat().st_size
+                object_path.unlink()
+                removed += 1
+        
+        return removed, freed
+    
+    def _cleanup_old_manifests(self, backup_name: Optional[str] = None) -> int:
+        """Apply the retention policy to store manifests and garbage-collect objects"""
+        self._print_colored("\n🧹 Managing store retention...", Colors.BLUE)
+        
+        manifests = {path: self._load_manifest(path) for path in self._list_manifests()}
+        if any(manifest is None for manifest in manifests.values()):
+            # Never delete anything while a manifest can't be read
+            return 0
+        
+        entries = [
+            (path, self._parse_backup_timestamp(path), manifest.get("logical_bytes", 0))
+            for path, manifest in manifests.items()
+        ]
+        keep, remove = self.retention.plan(entries)
+        remove = [path for path in remove if path.stem != backup_name]
+        
+        # Objects only referenced by removed manifests are what a GC would free
+        kept_hashes = {
+            entry["hash"] for path in manifests if path not in remove
+            for entry in manifests[path]["files"].values()
+        }
+        freed_objects = {
+            entry["hash"]: entry["size"] for path in remove
+            for entry in manifests[path]["files"].values() if entry["hash"] not in kept_hashes
+        }
+        self._report_retention_plan(len(manifests), remove, sum(freed_objects.values()))
+        
+        if self.dry_run:
             return 0
+        for path in remove:
+            path.unlink()
+        removed_objects, freed = self._collect_garbage()
+        if removed_objects:
+            self._print_colored(
+                f"✅ Garbage collected {removed_objects} objects ({self._format_bytes(freed)})", Colors.GREEN
+            )
+        return len(remove)
+    
+    @staticmethod
+    def _restore_destination(target: Path, relative_path: str) -> Path:
+        """Map a backup-relative path into target, refusing paths that escape it"""
+        parts = Path(relative_path).parts
+        if not parts or Path(relative_path).is_absolute() or ".." in parts:
+            raise ValueError(f"Unsafe path in backup: {relative_path}")
+        return target.joinpath(*parts)
+    
+    def _is_unchanged(self, dst_file: Path, size: int, mtime_ns: int,
+                      expected_hash: Optional[str], src_file: Optional[Path] = None,
+                      mtime_precision_ns: int = 0) -> bool:
+        """True if dst_file already has the backed-up size, mtime and contents
+        
+        mtime_precision_ns allows for backups that store mtimes coarser than
+        the filesystem does (archives).
+        """
+        try:
+            dst_stat = dst_file.stat()
+        except OSError:
+            return False
+        if dst_stat.st_size != size or abs(dst_stat.st_mtime_ns - mtime_ns) > mtime_precision_ns:
+            return False
+        if expected_hash is None:
+            expected_hash, _ = self._hash_file(src_file)
+        return self._hash_file(dst_file)[0] == expected_hash
+    
+    def _restore_file(self, src_file: Path, dst_file: Path, entry: Dict) -> bool:
+        """Restore one file from a tree or store backup; returns False if it was skipped
+        
+        Files are written to a temporary sibling and renamed into place, so a
+        destination that happens to be hard-linked into a backup is never
+        modified in place.
+        """
+        if self._is_unchanged(dst_file, entry["size"], entry["mtime_ns"], entry.get("hash"), src_file):
+            return False
+        
+        dst_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = dst_file.with_name(f".{dst_file.name}.restore-tmp")
+        shutil.copyfile(src_file, tmp_file)
+        if "mode" in entry:
+            os.chmod(tmp_file, entry["mode"])
+            os.utime(tmp_file, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+        else:
+            # Tree backups carry the metadata shutil.copy2 stored on the copy itself
+            shutil.copystat(src_file, tmp_file)
+        os.replace(tmp_file, dst_file)
+        return True
+    
+    def _restore_plan(self, backup_path: Path) -> Optional[Tuple[List[str], Dict[str, Dict]]]:
+        """List (dirs, files) of a tree or store backup; files map to their source and metadata"""
+        if backup_path.parent == self.manifests_dir:
+            manifest = self._load_manifest(backup_path)
+            if manifest is None:
+                return None
+            files = {
+                relative_file: dict(entry, source=self._object_path(entry["hash"]))
+                for relative_file, entry in manifest["files"].items()
+            }
+            return manifest.get("dirs", []), files
+        
+        checksums = self._read_backup_checksums(backup_path) or {}
+        dirs: List[str] = []
+        files: Dict[str, Dict] = {}
+        for root, dir_names, file_names in os.walk(backup_path):
+            relative_root = Path(root).relative_to(backup_path)
+            dirs.extend((relative_root / name).as_posix() for name in dir_names)
+            for name in file_names:
+                relative_file = (relative_root / name).as_posix()
+                if relative_file in BACKUP_META_FILES:
+                    continue
+                src_stat = os.stat(os.path.join(root, name))
+                files[relative_file] = {
+                    "source": Path(root) / name,
+                    "size": src_stat.st_size,
+                    "mtime_ns": src_stat.st_mtime_ns,
+                    "hash": checksums.get(relative_file, {}).get("hash"),
+                }
+        return dirs, files
+    
+    def _restore_from_archive(self, archive_path: Path, target: Path,
+                              selector: Optional[ExcludeMatcher]) -> Tuple[int, int, int]:
+        """Restore from an archive sequentially, returning (restored, skipped, bytes)"""
+        restored = skipped = restored_bytes = 0
+        mtime_precision_ns = ARCHIVE_MTIME_PRECISION_NS[archive_format_for(archive_path)]
+        for member in iter_archive_members(archive_path):
+            if member.name in BACKUP_META_FILES:
+                continue
+            if selector is not None and not selector.excludes(member.name, member.is_dir):
+                continue
+            
+            try:
+                dst_path = self._restore_destination(target, member.name)
+                if member.is_dir:
+                    dst_path.mkdir(parents=True, exist_ok=True)
+                    continue
+                
+                dst_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = dst_path.with_name(f".{dst_path.name}.restore-tmp")
+                reader = HashingReader(member.fileobj)
+                with open(tmp_file, 'wb') as out:
+                    shutil.copyfileobj(reader, out, HASH_CHUNK_SIZE)
+                
+                # PAX headers keep sub-second mtimes, so do not truncate them
+                mtime_ns = round(member.mtime * 1_000_000_000)
+                if self._is_unchanged(dst_path, reader.size, mtime_ns, reader.hexdigest(),
+                                      mtime_precision_ns=mtime_precision_ns):
+                    tmp_file.unlink()
+                    skipped += 1
+                    continue
+                
+                os.chmod(tmp_file, member.mode)
+                os.utime(tmp_file, ns=(mtime_ns, mtime_ns))
+                os.replace(tmp_file, dst_path)
+                restored += 1
+                restored_bytes += reader.size
+            except (OSError, ValueError) as e:
+                self._record_copy_error(Path(member.name), e)
+        return restored, skipped, restored_bytes
+    
+    def restore_backup(self, backup_name: str, target: Path, only: Optional[List[str]] = None) -> bool:
+        """Restore a backup (or "latest"), or the paths matching only, into target
+        
+        Works for tree, archive and store backups. Files that already match
+        the backup in size, mtime and hash are skipped; tree and store
+        backups are restored with a pool of --jobs workers.
+        """
+        self._print_colored("♻️  FIGDREAM Project Restore", Colors.BLUE)
+        self._print_colored("==========================", Colors.BLUE)
+        
+        backup_path = self._resolve_backup(backup_name)
+        if backup_path is None:
+            self._print_colored(f"❌ No backup named '{backup_name}' found", Colors.RED)
+            return False
+        
+        target = target.resolve()
+        selector = ExcludeMatcher(only) if only else None
+        self._print_colored(f"📦 Backup: {backup_path}", Colors.BLUE)
+        self._print_colored(f"📁 Target: {target}", Colors.BLUE)
+        if only:
+            self._print_colored(f"🎯 Only: {', '.join(only)}", Colors.BLUE)
+        
+        start = time.perf_counter()
+        target.mkdir(parents=True, exist_ok=True)
+        
+        if archive_format_for(backup_path):
+            restored, skipped, restored_bytes = self._restore_from_archive(backup_path, target, selector)
+        else:
+            plan = self._restore_plan(backup_path)
+            if plan is None:
+                return False
+            dirs, files = plan
+            if selector is not None:
+                dirs = [d for d in dirs if selector.excludes(d, True)]
+                files = {f: entry for f, entry in files.items() if selector.excludes(f, False)}
+            
+            for relative_dir in dirs:
+                self._restore_destination(target, relative_dir).mkdir(parents=True, exist_ok=True)
+            
+            def restore_one(item: Tuple[str, Dict]) -> Optional[bool]:
+                relative_file, entry = item
+                try:
+                    dst_file = self._restore_destination(target, relative_file)
+                    return self._restore_file(entry["source"], dst_file, entry)
+                except (OSError, ValueError) as e:
+                    self._record_copy_error(Path(relative_file), e)
+                    return None
+            
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                outcomes = list(executor.map(restore_one, files.items()))
+            restored = outcomes.count(True)
+            skipped = outcomes.count(False)
+            restored_bytes = sum(
+                entry["size"] for entry, outcome in zip(files.values(), outcomes) if outcome
+            )
+        
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        profiler.count("files restored", restored)
+        profiler.count("bytes restored", restored_bytes)
+        if self.copy_errors:
+            self._report_copy_errors()
+        
+        self._print_colored(
+            f"\n📊 Restored {restored} files ({self._format_bytes(restored_bytes)}), "
+            f"skipped {skipped} unchanged, in {elapsed:.2f}s "
+            f"({self._format_bytes(int(restored_bytes / elapsed))}/s)",
+            Colors.BLUE
+        )
+        if self.copy_errors:
+            self._print_colored("\n❌ Restore incomplete", Colors.RED)
+            return False
+        self._print_colored(f"\n✅ Restored to {target}", Colors.GREEN)
+        return True
+    
+    def _write_backup_manifest(self, backup_path: Path, backup_name: str) -> Path:
+        """Persist walk statistics so listing backups never has to rescan them
+        
+        The checksums go into BACKUP_CHECKSUMS.json next to it, so listing
+        and pruning backups never parse a per-file map.
+        """
+        manifest_file = backup_path / "BACKUP_MANIFEST.json"
+        manifest = {
+            "backup_name": backup_name,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "project_root": str(self.project_root),
+            "incremental_from": self.link_dest.name if self.link_dest is not None else None,
+            "linked_files": self.linked_files,
+            "copied_files": self.copied_files,
+            "copy_mechanisms": self.copy_mechanism_counts,
+            "stats": dict(self.stats),
+        }
+        with open(backup_path / "BACKUP_CHECKSUMS.json", 'w') as f:
+            json.dump(self._checksum_record(), f, indent=1, sort_keys=True)
+        with open(manifest_file, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        return manifest_file
+    
+    def _checksum_record(self) -> Dict:
+        """Contents of BACKUP_CHECKSUMS.json"""
+        return {"hash_algorithm": HASH_ALGORITHM, "files": self.file_checksums}
+    
+    def _read_backup_manifest(self, backup_path: Path) -> Optional[Dict]:
+        """Read the manifest written by _write_backup_manifest"""
+        try:
+            with open(backup_path / "BACKUP_MANIFEST.json", 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+    
+    def _read_backup_checksums(self, backup_path: Path) -> Optional[Dict[str, Dict]]:
+        """Read the per-file checksums written by _write_backup_manifest"""
+        try:
+            with open(backup_path / "BACKUP_CHECKSUMS.json", 'r') as f:
+                return json.load(f).get("files")
+        except (OSError, json.JSONDecodeError):
+            return None
+    
+    def _read_backup_stats(self, backup_path: Path) -> Optional[Dict[str, int]]:
+        """Read the statistics recorded by _write_backup_manifest"""
+        manifest = self._read_backup_manifest(backup_path)
+        return manifest.get("stats") if manifest else None
     
     def _create_backup_info(self, backup_path: Path, backup_size_mb: int, timestamp: str):
         """Create backup info file"""
         info_file = backup_path / "BACKUP_INFO.txt"
         
+        with open(info_file, 'w') as f:
+            f.write(self._build_backup_info(backup_path, backup_size_mb, timestamp))
+        
+        return info_file
+    
+    def _build_backup_info(self, backup_path: Path, backup_size_mb: int, timestamp: str) -> str:
+        """Build backup info text"""
         # Get git information
         git_status = "Not a git repository"
         git_commit = "No git commit found"
@@ -242,6 +1410,14 @@ class ProjectBackup:
             except (json.JSONDecodeError, KeyError):
                 pass
         
+        if self.backend == "store":
+            backup_mode = f"content-addressed store ({self.store_dir})"
+        elif self.link_dest is not None:
+            backup_mode = (f"incremental (linked against {self.link_dest.name}: "
+                           f"{self.linked_files} linked, {self.copied_files} copied)")
+        else:
+            backup_mode = "full"
+        
         info_content = f"""FIGDREAM Project Backup
 ======================
 
@@ -249,6 +1425,7 @@ Backup Created: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 Original Path: {self.project_root}
 Backup Path: {backup_path}
 Backup Size: {backup_size_mb}MB
+Backup Mode: {backup_mode}
 
 Excluded Patterns:
 {chr(10).join(f'- {pattern}' for pattern in self.exclude_patterns)}
@@ -263,42 +1440,151 @@ Package.json Info:
 {package_info}
 """
         
-        with open(info_file, 'w') as f:
-            f.write(info_content)
-        
-        return info_file
+        return info_content
     
     def _verify_backup_integrity(self, backup_path: Path) -> bool:
-        """Verify backup integrity by checking key files and directories"""
+        """Quick post-copy check: every manifest entry exists with its recorded size
+        
+        Use --verify for a full checksum pass.
+        """
         self._print_colored("\n🔍 Verifying backup integrity...", Colors.BLUE)
         
-        success = True
+        bad = []
+        for relative_file, entry in self.file_checksums.items():
+            try:
+                if (backup_path / relative_file).stat().st_size == entry["size"]:
+                    continue
+            except OSError:
+                pass
+            bad.append(relative_file)
         
-        # Check key files
-        key_files = ["CLAUDE.md", "package.json", "turbo.json"]
-        for file_name in key_files:
-            src_file = self.project_root / file_name
-            dst_file = backup_path / file_name
-            
-            if src_file.exists() and dst_file.exists():
-                self._print_colored(f"✅ {file_name}", Colors.GREEN)
-            elif src_file.exists():
-                self._print_colored(f"❌ {file_name} (missing in backup)", Colors.RED)
-                success = False
-        
-        # Check key directories
-        key_dirs = ["apps", "packages", "scripts"]
-        for dir_name in key_dirs:
-            src_dir = self.project_root / dir_name
-            dst_dir = backup_path / dir_name
-            
-            if src_dir.exists() and dst_dir.exists():
-                self._print_colored(f"✅ {dir_name}/", Colors.GREEN)
-            elif src_dir.exists():
-                self._print_colored(f"❌ {dir_name}/ (missing in backup)", Colors.RED)
-                success = False
+        for relative_file in bad[:MAX_REPORTED_ERRORS]:
+            self._print_colored(f"❌ {relative_file} (missing or wrong size in backup)", Colors.RED)
+        if bad:
+            return False
+        
+        self._print_colored(f"✅ {len(self.file_checksums)} files present with recorded sizes", Colors.GREEN)
+        return True
+    
+    @staticmethod
+    def _backup_stem(backup_path: Path) -> str:
+        """Backup name without any archive or manifest suffix"""
+        archive_format = archive_format_for(backup_path)
+        if archive_format:
+            return backup_path.name[:-len(archive_format) - 1]
+        if backup_path.suffix == ".json":
+            return backup_path.stem
+        return backup_path.name
+    
+    def _resolve_backup(self, backup_name: str) -> Optional[Path]:
+        """Find a tree, archive or store backup by name ("latest" picks the newest)"""
+        candidates = self._list_backups() + self._list_manifests()
+        
+        if backup_name == "latest":
+            return max(candidates, key=self._backup_stem, default=None)
+        for backup_path in candidates:
+            if backup_name in (backup_path.name, self._backup_stem(backup_path)):
+                return backup_path
+        return None
+    
+    def _hash_in_parallel(self, paths: Dict[str, Path]) -> Dict[str, Optional[Tuple[str, int]]]:
+        """Hash many files concurrently; missing or unreadable files map to None"""
+        def hash_one(path: Path) -> Optional[Tuple[str, int]]:
+            try:
+                return self._hash_file(path)
+            except OSError:
+                return None
+        
+        workers = self.jobs if self.jobs > 1 else (os.cpu_count() or 4)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(paths.keys(), executor.map(hash_one, paths.values())))
+    
+    def verify_backup(self, backup_name: str) -> bool:
+        """Re-hash a backup against its checksum manifest"""
+        self._print_colored("🔍 FIGDREAM Backup Verification", Colors.BLUE)
+        self._print_colored("==============================", Colors.BLUE)
+        
+        backup_path = self._resolve_backup(backup_name)
+        if backup_path is None:
+            self._print_colored(f"❌ No backup named '{backup_name}' found", Colors.RED)
+            return False
+        self._print_colored(f"📦 Backup: {backup_path}", Colors.BLUE)
+        
+        start = time.perf_counter()
+        extra: List[str] = []
+        
+        if backup_path.parent == self.manifests_dir:
+            manifest = self._load_manifest(backup_path)
+            expected = manifest["files"] if manifest else None
+            if expected is not None:
+                results = self._hash_in_parallel({
+                    relative_file: self._object_path(entry["hash"])
+                    for relative_file, entry in expected.items()
+                })
+        elif archive_format_for(backup_path):
+            # Archives can only be read sequentially; the checksums follow the files
+            checksums = None
+            results = {}
+            for member in iter_archive_members(backup_path):
+                if member.is_dir or member.name in ("BACKUP_INFO.txt", "BACKUP_MANIFEST.json"):
+                    continue
+                if member.name == "BACKUP_CHECKSUMS.json":
+                    checksums = json.load(member.fileobj)
+                    continue
+                reader = HashingReader(member.fileobj)
+                while reader.read(HASH_CHUNK_SIZE):
+                    pass
+                results[member.name] = (reader.hexdigest(), reader.size)
+            expected = checksums.get("files") if checksums else None
+            if expected is not None:
+                extra = sorted(set(results) - set(expected))
+        else:
+            expected = self._read_backup_checksums(backup_path)
+            if expected is not None:
+                on_disk = set()
+                for root, _, files in os.walk(backup_path):
+                    relative_root = Path(root).relative_to(backup_path)
+                    on_disk.update((relative_root / name).as_posix() for name in files)
+                on_disk.difference_update(BACKUP_META_FILES)
+                extra = sorted(on_disk - set(expected))
+                results = self._hash_in_parallel({
+                    relative_file: backup_path / relative_file for relative_file in expected
+                })
         
-        return success
+        if expected is None:
+            self._print_colored("❌ No checksum manifest found (backup predates checksums?)", Colors.RED)
+            return False
+        
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        missing = sorted(name for name in expected if results.get(name) is None)
+        corrupted = sorted(
+            name for name, entry in expected.items()
+            if results.get(name) is not None and results[name] != (entry["hash"], entry["size"])
+        )
+        hashed_bytes = sum(result[1] for result in results.values() if result is not None)
+        
+        for label, names in (("missing", missing), ("extra", extra), ("corrupted", corrupted)):
+            for name in names[:MAX_REPORTED_ERRORS]:
+                self._print_colored(f"❌ {name} ({label})", Colors.RED)
+            if len(names) > MAX_REPORTED_ERRORS:
+                self._print_colored(f"  ... and {len(names) - MAX_REPORTED_ERRORS} more {label}", Colors.RED)
+        
+        self._print_colored(
+            f"\n📊 {len(expected)} files checked: {len(missing)} missing, {len(extra)} extra, "
+            f"{len(corrupted)} corrupted",
+            Colors.BLUE
+        )
+        self._print_colored(
+            f"⚡ Hashed {self._format_bytes(hashed_bytes)} in {elapsed:.2f}s "
+            f"({self._format_bytes(int(hashed_bytes / elapsed))}/s, {len(results) / elapsed:.0f} files/s)",
+            Colors.BLUE
+        )
+        
+        if missing or extra or corrupted:
+            self._print_colored("\n❌ Verification failed", Colors.RED)
+            return False
+        self._print_colored("\n✅ Backup verified", Colors.GREEN)
+        return True
     
     def _show_backup_contents(self, backup_path: Path):
         """Show backup contents summary"""
@@ -334,75 +1620,108 @@ Package.json Info:
         else:
             self._print_colored("  🔧 No scripts directory", Colors.YELLOW)
     
-    def _cleanup_old_backups(self, backup_name: str) -> int:
-        """Clean up old backups, keeping only the last 10"""
-        self._print_colored("\n🧹 Managing backup retention...", Colors.BLUE)
+    def _backup_size(self, backup_path: Path) -> int:
+        """Size of a tree or archive backup, from its manifest or a single stat"""
+        if backup_path.is_file():
+            return backup_path.stat().st_size
+        stats = self._read_backup_stats(backup_path)
+        return stats["included_bytes"] if stats else 0
+    
+    def _report_retention_plan(self, total: int, remove: List[Path], freed_bytes: int):
+        """Print what retention keeps and removes (or would, with --dry-run)"""
+        self._print_colored(f"🔄 Policy: {self.retention.describe()}", Colors.BLUE)
+        verb = "Would remove" if self.dry_run else "Removing"
+        for path in remove:
+            self._print_colored(f"🗑️  {verb} old backup: {path.name}", Colors.YELLOW)
+        if remove:
+            self._print_colored(
+                f"{'🔍' if self.dry_run else '✅'} {verb} {len(remove)} of {total} backups, "
+                f"freeing up to {self._format_bytes(freed_bytes)}",
+                Colors.GREEN
+            )
+        else:
+            self._print_colored(f"✅ All {total} backups kept by the retention policy", Colors.GREEN)
+    
+    @staticmethod
+    def _remove_backup(backup_path: Path):
+        if backup_path.is_dir():
+            shutil.rmtree(backup_path)
+        else:
+            backup_path.unlink()
+    
+    def _cleanup_old_backups(self, backup_name: Optional[str] = None) -> int:
+        """Apply the retention policy to tree and archive backups
         
-        backup_pattern = f"{self.project_name}_backup_*"
-        backup_glob = self.backup_base_dir / backup_pattern
+        The timestamp encoded by _create_backup_name decides which buckets a
+        backup falls into. Freed sizes come from each backup's manifest, so
+        for hard-linked incremental snapshots they are an upper bound.
+        Deletions run in parallel.
+        """
+        self._print_colored("\n🧹 Managing backup retention...", Colors.BLUE)
         
-        old_backups = []
-        for backup_path in backup_glob.glob("*"):
-            if backup_path.is_dir() and backup_path.name != backup_name:
-                old_backups.append(backup_path)
+        backups = self._list_backups()
+        entries = [
+            (path, self._parse_backup_timestamp(path), self._backup_size(path))
+            for path in backups
+        ]
+        keep, remove = self.retention.plan(entries)
+        # The backup that was just created is always kept
+        remove = [path for path in remove if self._backup_stem(path) != backup_name]
         
-        # Sort by modification time (newest first)
-        old_backups.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+        sizes = {path: size for path, _, size in entries}
+        self._report_retention_plan(len(backups), remove, sum(sizes[path] for path in remove))
         
-        if len(old_backups) > 10:
-            self._print_colored(f"Found {len(old_backups)} backups, keeping latest 10...", Colors.BLUE)
-            
-            # Remove oldest backups (keep 10)
-            for old_backup in old_backups[10:]:
-                self._print_colored(f"🗑️  Removing old backup: {old_backup.name}", Colors.YELLOW)
-                shutil.rmtree(old_backup)
-            
-            self._print_colored("✅ Cleanup completed", Colors.GREEN)
-            return len(old_backups) - 10
-        else:
-            self._print_colored(f"✅ Backup count ({len(old_backups)}) within retention limit (10)", Colors.GREEN)
+        if self.dry_run or not remove:
             return 0
+        with ThreadPoolExecutor(max_workers=min(len(remove), max(self.jobs, 4))) as executor:
+            for path, error in zip(remove, executor.map(self._try_remove_backup, remove)):
+                if error is not None:
+                    self._print_colored(f"❌ Could not remove {path.name}: {error}", Colors.RED)
+        return len(remove)
+    
+    def _try_remove_backup(self, backup_path: Path) -> Optional[Exception]:
+        try:
+            self._remove_backup(backup_path)
+            return None
+        except OSError as e:
+            return e
+    
+    def prune_backups(self) -> bool:
+        """Apply the retention policy without creating a backup"""
+        self._print_colored("🧹 FIGDREAM Backup Retention", Colors.BLUE)
+        self._print_colored("===========================", Colors.BLUE)
+        if self.dry_run:
+            self._print_colored("🔍 Dry run: nothing will be deleted", Colors.YELLOW)
+        
+        self._cleanup_old_backups()
+        if self.manifests_dir.is_dir():
+            self._cleanup_old_manifests()
+        return True
     
     def _show_available_backups(self):
         """Show available backups for this project"""
         self._print_colored("\n📚 Available backups for this project:", Colors.BLUE)
         
-        backup_pattern = f"{self.project_name}_backup_*"
-        backup_glob = self.backup_base_dir / backup_pattern
-        
-        backups = []
-        for backup_path in backup_glob.glob("*"):
-            if backup_path.is_dir():
-                backups.append(backup_path)
-        
-        # Sort by modification time (newest first)
-        backups.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+        # Sort by the timestamp in the name (newest first)
+        backups = sorted(self._list_backups(), key=self._backup_stem, reverse=True)
         
         for backup_path in backups[:5]:  # Show only 5 most recent
-            try:
-                result = subprocess.run(
-                    ["du", "-sh", str(backup_path)],
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
-                backup_size = result.stdout.split()[0]
-            except subprocess.CalledProcessError:
-                backup_size = "Unknown"
+            backup_size = self._backup_size(backup_path)
+            backup_size = self._format_bytes(backup_size) if backup_size else "Unknown"
             
-            # Parse timestamp from backup name
-            timestamp_match = backup_path.name.split('_')[-2:]
-            if len(timestamp_match) == 2:
-                try:
-                    date_part = timestamp_match[0]
-                    time_part = timestamp_match[1]
-                    formatted_date = f"{date_part[:4]}-{date_part[4:6]}-{date_part[6:8]} {time_part[:2]}:{time_part[2:4]}:{time_part[4:6]}"
-                except (ValueError, IndexError):
-                    formatted_date = "Unknown date"
-            else:
-                formatted_date = "Unknown date"
+            timestamp = self._parse_backup_timestamp(backup_path)
+            formatted_date = timestamp.strftime('%Y-%m-%d %H:%M:%S') if timestamp else "Unknown date"
             
             self._print_colored(f"  💾 {backup_path.name} ({backup_size}) - {formatted_date}")
+        
+        for manifest_path in self._list_manifests()[:5]:
+            manifest = self._load_manifest(manifest_path)
+            if manifest is None:
+                continue
+            logical_size = self._format_bytes(manifest.get("logical_bytes", 0))
+            self._print_colored(
+                f"  🗄️  {manifest_path.stem} ({logical_size} in store) - {manifest.get('created', 'Unknown date')}"
+            )
     
     def create_backup(self, interactive: bool = False) -> bool:
         """Main backup creation method"""
@@ -416,7 +1735,12 @@ Package.json Info:
         # Generate backup information
         timestamp = self._get_timestamp()
         backup_name = self._create_backup_name(timestamp)
-        backup_path = self.backup_base_dir / backup_name
+        if self.backend == "store":
+            backup_path = self.manifests_dir / f"{backup_name}.json"
+        elif self.archive_format != "dir":
+            backup_path = self.backup_base_dir / f"{backup_name}.{self.archive_format}"
+        else:
+            backup_path = self.backup_base_dir / backup_name
         
         self._print_colored(f"📁 Project: {self.project_name}", Colors.BLUE)
         self._print_colored(f"📅 Timestamp: {timestamp}", Colors.BLUE)
@@ -429,11 +1753,15 @@ Package.json Info:
             self._print_colored(f"  📂 {pattern}", Colors.YELLOW)
         print()
         
-        # Calculate estimated size
-        self._print_colored("📊 Calculating backup size...", Colors.BLUE)
-        estimated_size = self._get_source_size_mb()
-        self._print_colored(f"📏 Estimated backup size: ~{estimated_size}MB", Colors.BLUE)
-        print()
+        # Pick the snapshot to hard-link unchanged files against
+        if self.incremental and self.backend == "tree":
+            self.link_dest = self._find_latest_backup(backup_name)
+            if self.link_dest is not None:
+                self._print_colored(f"🔗 Incremental against: {self.link_dest.name}", Colors.BLUE)
+                self.link_dest_checksums = self._read_backup_checksums(self.link_dest) or {}
+            else:
+                self._print_colored("🔗 No previous backup found, creating full backup", Colors.YELLOW)
+            print()
         
         # Confirm backup creation
         if interactive:
@@ -448,35 +1776,54 @@ Package.json Info:
         # Ensure backup directory exists
         self.backup_base_dir.mkdir(parents=True, exist_ok=True)
         
+        if self.backend == "store":
+            return self._create_store_backup(backup_name, timestamp)
+        if self.archive_format != "dir":
+            return self._create_archive_backup(backup_name, backup_path, timestamp)
+        
         # Perform the backup
-        if self._copy_with_exclusions(self.project_root, backup_path):
+        with profiler.step("copy walk"):
+            copied = self._copy_with_exclusions(self.project_root, backup_path, self.link_dest)
+        if copied:
             self._print_colored("\n✅ Backup created successfully!", Colors.GREEN)
+            if self.link_dest is not None:
+                self._print_colored(
+                    f"🔗 {self.linked_files} unchanged files hard-linked, {self.copied_files} copied",
+                    Colors.GREEN
+                )
             
-            # Calculate actual backup size
-            backup_size_mb = self._get_backup_size_mb(backup_path)
+            # Size statistics were gathered during the copy walk
+            backup_size_mb = self.stats["included_bytes"] // (1024 * 1024)
+            with profiler.step("write manifest"):
+                self._write_backup_manifest(backup_path, backup_name)
             
             self._print_colored(f"📁 Backup location: {backup_path}", Colors.GREEN)
             self._print_colored(f"📏 Actual backup size: {backup_size_mb}MB", Colors.GREEN)
+            self._print_size_stats()
             
             # Create backup info file
             info_file = self._create_backup_info(backup_path, backup_size_mb, timestamp)
             self._print_colored(f"📄 Backup info saved to: {info_file}", Colors.BLUE)
             
             # Verify backup integrity
-            if self._verify_backup_integrity(backup_path):
+            with profiler.step("verify"):
+                verified = self._verify_backup_integrity(backup_path)
+            if verified:
                 # Show backup contents
                 self._show_backup_contents(backup_path)
                 
                 # Cleanup old backups
-                self._cleanup_old_backups(backup_name)
+                with profiler.step("retention"):
+                    self._cleanup_old_backups(backup_name)
                 
                 # Success summary
                 self._print_colored("\n🎉 Backup completed successfully!", Colors.GREEN)
                 self._print_colored("======================================", Colors.GREEN)
                 self._print_colored(f"📁 Location: {backup_path}")
                 self._print_colored(f"📏 Size: {backup_size_mb}MB")
+                self._print_copy_mechanisms()
                 self._print_colored(f"📅 Created: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                self._print_colored("🔄 Retention: Keeping 10 most recent backups")
+                self._print_colored(f"🔄 Retention: {self.retention.describe()}")
                 
                 # Show available backups
                 self._show_available_backups()
@@ -490,6 +1837,207 @@ Package.json Info:
             self._print_colored("\n❌ Backup failed!", Colors.RED)
             self._print_colored("Check permissions and disk space", Colors.RED)
             return False
+    
+    def _print_copy_mechanisms(self):
+        """Print which copy mechanisms were used and the throughput achieved"""
+        if not self.copy_mechanism_counts:
+            return
+        used = ", ".join(
+            f"{mechanism} ({self.copy_mechanism_counts[mechanism]} files)"
+            for mechanism in COPY_MECHANISMS if mechanism in self.copy_mechanism_counts
+        )
+        rate = self.copied_bytes / self.copy_seconds if self.copy_seconds > 0 else 0
+        self._print_colored(f"⚙️  Copy mechanism: {used}", Colors.BLUE)
+        self._print_colored(
+            f"⚡ Copied {self._format_bytes(self.copied_bytes)} in {self.copy_seconds:.2f}s "
+            f"({self._format_bytes(int(rate))}/s)",
+            Colors.BLUE
+        )
+    
+    def _print_size_stats(self):
+        """Print included vs excluded totals from the walk"""
+        self._print_colored(
+            f"📊 Included: {self.stats['included_files']} files, {self.stats['included_dirs']} dirs "
+            f"({self._format_bytes(self.stats['included_bytes'])})",
+            Colors.BLUE
+        )
+        self._print_colored(
+            f"🚫 Excluded: {self.stats['excluded_files']} files "
+            f"({self._format_bytes(self.stats['excluded_bytes'])}), "
+            f"{self.stats['excluded_dirs']} dirs (not scanned)",
+            Colors.BLUE
+        )
+    
+    def _write_archive(self, src: Path, archive_path: Path, backup_name: str,
+                       timestamp: str) -> Optional[List[str]]:
+        """Stream the filtered walk into an archive, returning the member names"""
+        written: List[str] = []
+        writer = None
+        try:
+            writer = ArchiveWriter(archive_path, self.archive_format)
+            self._print_colored(f"🗜️  Compressor: {writer.compressor}", Colors.BLUE)
+            
+            for root_path, relative_root, dirs, files in self._walk_with_exclusions(src):
+                for dir_name in dirs:
+                    arcname = (relative_root / dir_name).as_posix()
+                    try:
+                        writer.add_directory(arcname, (root_path / dir_name).stat())
+                    except OSError as e:
+                        self._record_copy_error(relative_root / dir_name, e)
+                        continue
+                    written.append(arcname)
+                
+                for entry in files:
+                    relative_file = relative_root / entry.name
+                    try:
+                        src_handle = open(entry.path, 'rb')
+                        file_stat = os.fstat(src_handle.fileno())
+                    except OSError as e:
+                        self._record_copy_error(relative_file, e)
+                        continue
+                    with src_handle:
+                        reader = HashingReader(src_handle)
+                        writer.add_file(reader, relative_file.as_posix(), file_stat)
+                    written.append(relative_file.as_posix())
+                    self.file_checksums[relative_file.as_posix()] = {
+                        "hash": reader.hexdigest(),
+                        "size": reader.size,
+                    }
+                    self.copied_files += 1
+                    profiler.count("bytes copied", reader.size)
+            
+            backup_size_mb = self.stats["included_bytes"] // (1024 * 1024)
+            manifest = {
+                "backup_name": backup_name,
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "project_root": str(self.project_root),
+                "stats": dict(self.stats),
+            }
+            writer.add_bytes(
+                "BACKUP_CHECKSUMS.json", json.dumps(self._checksum_record(), indent=1, sort_keys=True).encode()
+            )
+            writer.add_bytes("BACKUP_MANIFEST.json", json.dumps(manifest, indent=1, sort_keys=True).encode())
+            writer.add_bytes(
+                "BACKUP_INFO.txt",
+                self._build_backup_info(archive_path, backup_size_mb, timestamp).encode()
+            )
+            writer.close()
+        except Exception as e:
+            if writer is not None:
+                writer.abort()
+            self._print_colored(f"❌ Error while writing archive: {e}", Colors.RED)
+            return None
+        
+        if self.copy_errors:
+            self._report_copy_errors()
+            return None
+        return written
+    
+    def _verify_archive_integrity(self, archive_path: Path, expected: List[str]) -> bool:
+        """Re-read the archive and check every written member and the info file are present"""
+        self._print_colored("\n🔍 Verifying backup integrity...", Colors.BLUE)
+        
+        try:
+            members = {member.name for member in iter_archive_members(archive_path)}
+        except Exception as e:
+            self._print_colored(f"❌ Could not read archive: {e}", Colors.RED)
+            return False
+        
+        missing = [name for name in expected + ["BACKUP_INFO.txt"] if name not in members]
+        for name in missing[:MAX_REPORTED_ERRORS]:
+            self._print_colored(f"❌ {name} (missing in archive)", Colors.RED)
+        if missing:
+            return False
+        
+        self._print_colored(f"✅ {len(members)} archive members, BACKUP_INFO.txt present", Colors.GREEN)
+        return True
+    
+    def _create_archive_backup(self, backup_name: str, archive_path: Path, timestamp: str) -> bool:
+        """Back up into a single compressed archive"""
+        with profiler.step("archive walk"):
+            written = self._write_archive(self.project_root, archive_path, backup_name, timestamp)
+        if written is None:
+            if archive_path.exists():
+                archive_path.unlink()
+            self._print_colored("\n❌ Backup failed!", Colors.RED)
+            self._print_colored("Check permissions and disk space", Colors.RED)
+            return False
+        
+        archive_size = self._format_bytes(archive_path.stat().st_size)
+        self._print_colored("\n✅ Backup created successfully!", Colors.GREEN)
+        self._print_colored(f"📁 Backup location: {archive_path}", Colors.GREEN)
+        self._print_colored(
+            f"📏 Archive size: {archive_size} "
+            f"(from {self._format_bytes(self.stats['included_bytes'])})",
+            Colors.GREEN
+        )
+        self._print_size_stats()
+        
+        with profiler.step("verify"):
+            verified = self._verify_archive_integrity(archive_path, written)
+        if not verified:
+            self._print_colored("\n⚠️  Backup created but integrity check failed", Colors.YELLOW)
+            return False
+        
+        with profiler.step("retention"):
+            self._cleanup_old_backups(backup_name)
+        
+        self._print_colored("\n🎉 Backup completed successfully!", Colors.GREEN)
+        self._print_colored("======================================", Colors.GREEN)
+        self._print_colored(f"📁 Location: {archive_path}")
+        self._print_colored(f"📏 Size: {archive_size}")
+        self._print_colored(f"📅 Created: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        self._print_colored(f"🔄 Retention: {self.retention.describe()}")
+        
+        self._show_available_backups()
+        
+        self._print_colored("\n💾 Backup process completed!", Colors.GREEN)
+        return True
+    
+    def _create_store_backup(self, backup_name: str, timestamp: str) -> bool:
+        """Back up into the content-addressed store"""
+        with profiler.step("store walk"):
+            manifest = self._store_with_exclusions(self.project_root, backup_name)
+        if manifest is None:
+            self._print_colored("\n❌ Backup failed!", Colors.RED)
+            self._print_colored("Check permissions and disk space", Colors.RED)
+            return False
+        
+        logical_mb = manifest["logical_bytes"] // (1024 * 1024)
+        stored_mb = manifest["stored_bytes"] // (1024 * 1024)
+        manifest["info"] = self._build_backup_info(self.store_dir, logical_mb, timestamp)
+        with profiler.step("write manifest"):
+            manifest_path = self._write_manifest(manifest)
+        
+        self._print_colored("\n✅ Backup created successfully!", Colors.GREEN)
+        self._print_colored(
+            f"🗄️  {self.copied_files} files hashed, {self.linked_files} unchanged since last snapshot",
+            Colors.GREEN
+        )
+        self._print_colored(f"📄 Manifest: {manifest_path}", Colors.GREEN)
+        self._print_colored(f"📏 Logical size: {logical_mb}MB, new data stored: {stored_mb}MB", Colors.GREEN)
+        self._print_size_stats()
+        
+        with profiler.step("verify"):
+            verified = self._verify_store_backup(manifest)
+        if not verified:
+            self._print_colored("\n⚠️  Backup created but integrity check failed", Colors.YELLOW)
+            return False
+        
+        with profiler.step("retention"):
+            self._cleanup_old_manifests(backup_name)
+        
+        self._print_colored("\n🎉 Backup completed successfully!", Colors.GREEN)
+        self._print_colored("======================================", Colors.GREEN)
+        self._print_colored(f"📁 Location: {manifest_path}")
+        self._print_colored(f"📏 Size: {logical_mb}MB ({stored_mb}MB new)")
+        self._print_colored(f"📅 Created: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        self._print_colored(f"🔄 Retention: {self.retention.describe()}")
+        
+        self._show_available_backups()
+        
+        self._print_colored("\n💾 Backup process completed!", Colors.GREEN)
+        return True
 
 
 def main():
@@ -505,14 +2053,153 @@ def main():
         action="store_true", 
         help="Run with user confirmation prompts (default: non-interactive)"
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Hard-link files unchanged since the newest backup instead of copying them"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["tree", "store"],
+        default="tree",
+        help="Write a plain directory tree, or deduplicate into a content-addressed store (default: tree)"
+    )
+    parser.add_argument(
+        "--restore",
+        metavar="BACKUP_NAME",
+        help="Restore a tree, archive or store backup by name (or 'latest') instead of creating one"
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        metavar="PATTERN",
+        help="With --restore, only restore paths matching these .gitignore-style patterns"
+    )
+    parser.add_argument(
+        "--verify",
+        metavar="BACKUP_NAME",
+        help="Re-hash a backup by name (or 'latest') against its checksum manifest"
+    )
+    parser.add_argument(
+        "--target",
+        type=Path,
+        help="Directory to restore into (required with --restore)"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of parallel file copy/restore workers (default: 1)"
+    )
+    parser.add_argument(
+        "--keep-last",
+        type=int,
+        default=10,
+        help="Retention: always keep this many most recent backups (default: 10)"
+    )
+    parser.add_argument(
+        "--keep-hourly",
+        type=int,
+        default=0,
+        help="Retention: keep the newest backup of each of the last N hours"
+    )
+    parser.add_argument(
+        "--keep-daily",
+        type=int,
+        default=0,
+        help="Retention: keep the newest backup of each of the last N days"
+    )
+    parser.add_argument(
+        "--keep-weekly",
+        type=int,
+        default=0,
+        help="Retention: keep the newest backup of each of the last N weeks"
+    )
+    parser.add_argument(
+        "--keep-monthly",
+        type=int,
+        default=0,
+        help="Retention: keep the newest backup of each of the last N months"
+    )
+    parser.add_argument(
+        "--max-total-size",
+        type=parse_size,
+        help="Retention: drop the oldest backups until the total fits, e.g. 20G"
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Only apply the retention policy, without creating a backup"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report what retention would delete and free, without deleting"
+    )
+    parser.add_argument(
+        "--from-git",
+        action="store_true",
+        help="Back up the files listed in the git index plus untracked, non-ignored files instead of walking the tree"
+    )
+    parser.add_argument(
+        "--kernel-copy",
+        action="store_true",
+        help="Also try copy_file_range/sendfile when reflinks are unavailable; "
+             "each copied file is then read back once more to checksum it"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["dir"] + list(ARCHIVE_FORMATS),
+        default="dir",
+        help="Write a directory tree or stream into a compressed archive (default: dir)"
+    )
+    profiler.add_arguments(parser)
     
     args = parser.parse_args()
     
+    if args.restore and not args.target:
+        parser.error("--restore requires --target")
+    if args.format != "dir" and (args.backend == "store" or args.incremental):
+        parser.error("--format only applies to the tree backend without --incremental")
+    
+    retention = RetentionPolicy(
+        keep_last=args.keep_last,
+        keep_hourly=args.keep_hourly,
+        keep_daily=args.keep_daily,
+        keep_weekly=args.keep_weekly,
+        keep_monthly=args.keep_monthly,
+        max_total_bytes=args.max_total_size,
+    )
+    if not retention.has_keep_rule():
+        parser.error("retention would delete every backup: set --keep-last or a --keep-hourly/daily/weekly/monthly rule")
+    
     # Create backup instance
-    backup = ProjectBackup(args.project_root)
+    backup = ProjectBackup(
+        args.project_root,
+        incremental=args.incremental,
+        backend=args.backend,
+        jobs=args.jobs,
+        archive_format=args.format,
+        retention=retention,
+        dry_run=args.dry_run,
+        from_git=args.from_git,
+        kernel_copy=args.kernel_copy
+    )
     
-    # Run backup
-    success = backup.create_backup(interactive=args.interactive)
+    # Run restore, verify or backup
+    profiler.start(args)
+    if args.restore:
+        with profiler.step("restore"):
+            success = backup.restore_backup(args.restore, args.target, only=args.only)
+    elif args.verify:
+        with profiler.step("verify"):
+            success = backup.verify_backup(args.verify)
+    elif args.prune:
+        with profiler.step("retention"):
+            success = backup.prune_backups()
+    else:
+        success = backup.create_backup(interactive=args.interactive)
+    profiler.finish(args)
     
     sys.exit(0 if success else 1)
 
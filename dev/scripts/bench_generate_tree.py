@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""Benchmark generate_tree.py's walker against the previous iterdir-based one.
+
+Builds a synthetic tree (100k files by default) in a temporary directory,
+renders it with the legacy walker, the serial scandir walker, the
+parallel ``--jobs`` walker and a warm directory cache, and reports wall time plus the filesystem
+syscalls each one issued. ``--latency-ms`` adds a delay to every directory
+read to approximate a network mount.
+
+Syscalls are counted by wrapping ``os.listdir``, ``os.scandir``, ``os.stat``
+and ``os.lstat`` and every ``DirEntry`` that scandir hands out, so the
+numbers reflect what the walker asked the kernel for rather than sampling
+noise.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import tree_core
+from exclude_matcher import ExcludeMatcher
+
+SYSCALLS = Counter()
+SYSCALLS_LOCK = threading.Lock()
+LATENCY = 0.0  # seconds added to every directory read, to mimic a network mount
+
+
+def count(name: str) -> None:
+    with SYSCALLS_LOCK:
+        SYSCALLS[name] += 1
+
+
+# ---------------------------------------------------------------------------
+# Legacy walker, frozen as it was before the scandir rewrite
+# ---------------------------------------------------------------------------
+
+def legacy_count_items(directory: Path, rel_dir: str, show_hidden: bool, exclude: ExcludeMatcher) -> int:
+    return len(legacy_list_entries(directory, rel_dir, show_hidden, exclude))
+
+
+def legacy_list_entries(directory: Path, rel_dir: str, show_hidden: bool, exclude: ExcludeMatcher) -> List[Path]:
+    entries: List[Path] = []
+    rel_prefix = f"{rel_dir}/" if rel_dir else ""
+    for entry in directory.iterdir():
+        name = entry.name
+        if not show_hidden and name.startswith("."):
+            continue
+        if exclude and exclude.matches(rel_prefix + name, entry.is_dir()):
+            continue
+        entries.append(entry)
+    return sorted(entries, key=lambda p: (p.is_file(), p.name.lower()))
+
+
+def legacy_build_tree(
+    directory: Path,
+    rel_dir: str,
+    prefix: str,
+    show_hidden: bool,
+    exclude: ExcludeMatcher,
+    show_info: bool,
+) -> List[str]:
+    lines: List[str] = []
+    entries = legacy_list_entries(directory, rel_dir, show_hidden, exclude)
+    for idx, entry in enumerate(entries):
+        is_last = idx == len(entries) - 1
+        connector = "`-- " if is_last else "|-- "
+        next_prefix = "    " if is_last else "|   "
+        rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+
+        if entry.is_dir():
+            if show_info:
+                item_count = legacy_count_items(entry, rel_path, show_hidden, exclude)
+                info = f"[DIR] ({item_count:3d} items) "
+                lines.append(f"{prefix}{connector}{info}{entry.name}/")
+            else:
+                lines.append(f"{prefix}{connector}{entry.name}/")
+            lines.extend(legacy_build_tree(entry, rel_path, prefix + next_prefix, show_hidden, exclude, show_info))
+        else:
+            if show_info:
+                try:
+                    size = entry.stat().st_size
+                    info = f"[FILE] {tree_core.format_size(size)} "
+                    lines.append(f"{prefix}{connector}{info}{entry.name}")
+                except OSError:
+                    lines.append(f"{prefix}{connector}[FILE] (error)   {entry.name}")
+            else:
+                lines.append(f"{prefix}{connector}{entry.name}")
+    return lines
+
+
+def legacy_render(root: Path, exclude: ExcludeMatcher, show_info: bool) -> List[str]:
+    return legacy_build_tree(root, "", "", False, exclude, show_info)
+
+
+def current_render(
+    root: Path,
+    exclude: ExcludeMatcher,
+    show_info: bool,
+    jobs: int = 1,
+    cache: Optional[tree_core.DirCache] = None,
+) -> List[str]:
+    with tree_core.TreeScanner(False, exclude, show_info, jobs, cache) as scanner:
+        entries = scanner.scan(str(root), "")
+        return list(tree_core.build_tree(entries, "", "", scanner, show_info))
+
+
+# ---------------------------------------------------------------------------
+# Syscall accounting
+# ---------------------------------------------------------------------------
+
+class CountingEntry:
+    """DirEntry proxy that counts the stat calls scandir could not answer from d_type."""
+
+    __slots__ = ("_entry", "_stat_done", "_type_done")
+
+    def __init__(self, entry: os.DirEntry):
+        self._entry = entry
+        self._stat_done = False
+        self._type_done = False
+
+    @property
+    def name(self) -> str:
+        return self._entry.name
+
+    @property
+    def path(self) -> str:
+        return self._entry.path
+
+    def _type_lookup(self) -> None:
+        # Type checks on symlinks follow the link, which needs one stat.
+        if not self._type_done and not self._stat_done:
+            self._type_done = True
+            if self._entry.is_symlink():
+                count("stat")
+
+    def is_dir(self, *, follow_symlinks: bool = True) -> bool:
+        if follow_symlinks:
+            self._type_lookup()
+        return self._entry.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_file(self, *, follow_symlinks: bool = True) -> bool:
+        if follow_symlinks:
+            self._type_lookup()
+        return self._entry.is_file(follow_symlinks=follow_symlinks)
+
+    def is_symlink(self) -> bool:
+        return self._entry.is_symlink()
+
+    def stat(self, *, follow_symlinks: bool = True) -> os.stat_result:
+        if not self._stat_done:
+            self._stat_done = True
+            count("stat")
+        return self._entry.stat(follow_symlinks=follow_symlinks)
+
+
+class CountingScandir:
+    def __init__(self, iterator):
+        self._iterator = iterator
+
+    def __enter__(self) -> "CountingScandir":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._iterator.close()
+
+    def __iter__(self):
+        for entry in self._iterator:
+            yield CountingEntry(entry)
+
+    def close(self) -> None:
+        self._iterator.close()
+
+
+def install_counters() -> Callable[[], None]:
+    """Wrap the os-level filesystem calls; returns a function that restores them."""
+    originals = {name: getattr(os, name) for name in ("listdir", "scandir", "stat", "lstat")}
+
+    def counted(name: str):
+        original = originals[name]
+
+        def wrapper(*args, **kwargs):
+            count(name)
+            if LATENCY and name == "listdir":
+                time.sleep(LATENCY)
+            return original(*args, **kwargs)
+        return wrapper
+
+    def counting_scandir(*args, **kwargs):
+        count("scandir")
+        if LATENCY:
+            time.sleep(LATENCY)
+        return CountingScandir(originals["scandir"](*args, **kwargs))
+
+    os.listdir = counted("listdir")
+    os.stat = counted("stat")
+    os.lstat = counted("lstat")
+    os.scandir = counting_scandir
+
+    def restore() -> None:
+        for name, original in originals.items():
+            setattr(os, name, original)
+    return restore
+
+
+# ---------------------------------------------------------------------------
+# Synthetic tree and driver
+# ---------------------------------------------------------------------------
+
+def build_synthetic_tree(root: Path, files: int, fanout: int, depth: int) -> int:
+    """Spread ``files`` files evenly over ``fanout ** depth`` leaf directories."""
+    leaves = [root]
+    for _ in range(depth):
+        leaves = [parent / f"dir_{i:03d}" for parent in leaves for i in range(fanout)]
+    per_leaf = max(1, files // len(leaves))
+    created = 0
+    payload = b"x" * 64
+    for leaf in leaves:
+        leaf.mkdir(parents=True, exist_ok=True)
+        for i in range(per_leaf):
+            (leaf / f"file_{i:04d}.txt").write_bytes(payload)
+            created += 1
+    # A few noise entries the default excludes must prune
+    (root / "node_modules" / "pkg").mkdir(parents=True)
+    (root / ".git").mkdir()
+    return created
+
+
+def measure(render: Callable[[Path, ExcludeMatcher, bool], List[str]], root: Path, show_info: bool, repeat: int) -> Dict[str, object]:
+    exclude = ExcludeMatcher(["node_modules", ".git", ".next"])
+    best = float("inf")
+    counts: Counter = Counter()
+    lines: List[str] = []
+    for _ in range(repeat):
+        SYSCALLS.clear()
+        restore = install_counters()
+        try:
+            started = time.perf_counter()
+            lines = render(root, exclude, show_info)
+            elapsed = time.perf_counter() - started
+        finally:
+            restore()
+        best = min(best, elapsed)
+        counts = Counter(SYSCALLS)
+    return {"seconds": best, "syscalls": counts, "lines": lines}
+
+
+def warm_cache(root: Path, show_info: bool) -> tree_core.DirCache:
+    """Write and reload a directory cache the way a previous run would have."""
+    cache = tree_core.DirCache(root / tree_core.CACHE_RELATIVE_PATH)
+    cache.racy_window_ns = 0  # the synthetic tree was created moments ago
+    current_render(root, ExcludeMatcher(["node_modules", ".git", ".next"]), show_info, cache=cache)
+    cache.save()
+    return tree_core.DirCache.load(cache.path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the generate_tree walker on a synthetic tree.")
+    parser.add_argument("--files", type=int, default=100_000, help="Number of files to create (default: 100000)")
+    parser.add_argument("--fanout", type=int, default=10, help="Subdirectories per directory level (default: 10)")
+    parser.add_argument("--depth", type=int, default=3, help="Directory levels above the files (default: 3)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per walker; the fastest is reported (default: 3)")
+    parser.add_argument("--show-info", action="store_true", help="Benchmark with sizes and item counts enabled")
+    parser.add_argument("--jobs", type=int, default=8, help="Threads for the parallel scandir run (default: 8)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every directory read, e.g. 2 for an NFS-like mount")
+    parser.add_argument("--dir", type=Path, default=None, help="Reuse/create the synthetic tree here instead of a temp dir")
+    args = parser.parse_args()
+    global LATENCY
+    LATENCY = args.latency_ms / 1000
+
+    temp_dir = None
+    if args.dir:
+        root = args.dir.resolve()
+        if not root.exists():
+            print(f"Creating synthetic tree in {root} ...")
+            build_synthetic_tree(root, args.files, args.fanout, args.depth)
+    else:
+        temp_dir = tempfile.mkdtemp(prefix="bench-tree-")
+        root = Path(temp_dir)
+        print(f"Creating synthetic tree in {root} ...")
+        build_synthetic_tree(root, args.files, args.fanout, args.depth)
+
+    try:
+        results = {
+            "legacy (iterdir)": measure(legacy_render, root, args.show_info, args.repeat),
+            "scandir": measure(current_render, root, args.show_info, args.repeat),
+            f"scandir --jobs {args.jobs}": measure(partial(current_render, jobs=args.jobs), root, args.show_info, args.repeat),
+            "warm dir cache": measure(partial(current_render, cache=warm_cache(root, args.show_info)), root, args.show_info, args.repeat),
+        }
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    legacy, current = results["legacy (iterdir)"], results["scandir"]
+    if any(result["lines"] != legacy["lines"] for result in results.values()):
+        raise SystemExit("Walkers produced different output - benchmark aborted")
+
+    columns = ["listdir", "scandir", "stat", "lstat"]
+    print(
+        f"\n{len(current['lines'])} tree lines, show_info={args.show_info}, "
+        f"latency={args.latency_ms:g}ms per directory read, best of {args.repeat}\n"
+    )
+    print(f"{'walker':<22}{'wall':>10}" + "".join(f"{name:>10}" for name in columns) + f"{'total':>10}")
+    for label, result in results.items():
+        counts = result["syscalls"]
+        total = sum(counts[name] for name in columns)
+        print(
+            f"{label:<22}{result['seconds'] * 1000:>8.0f}ms"
+            + "".join(f"{counts[name]:>10}" for name in columns)
+            + f"{total:>10}"
+        )
+
+    legacy_total = sum(legacy["syscalls"].values())
+    current_total = sum(current["syscalls"].values()) or 1
+    parallel = results[f"scandir --jobs {args.jobs}"]
+    print(
+        f"\nscandir: {legacy['seconds'] / current['seconds']:.1f}x faster, "
+        f"{legacy_total / current_total:.1f}x fewer filesystem calls; "
+        f"--jobs {args.jobs}: {current['seconds'] / parallel['seconds']:.1f}x over serial scandir"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -11,19 +11,52 @@ This script performs a complete clean reinstall:
 6. Starts dev server (npm run dev)
 7. Opens browser in Chrome
 
+With --fast, steps 2-5 are skipped when package.json, package-lock.json,
+the Node/npm versions and the excluded-package set all match the
+fingerprint stored after the last successful install.
+
+With --background-delete, .next and node_modules are renamed into
+.fresh-install-trash and deleted by a detached worker process while the
+install goes ahead. Trash left behind by an interrupted run is reaped on
+the next run.
+
+Independent steps run concurrently: the project tree is generated while
+ports are freed, the latest dependency versions are looked up while .next
+and node_modules are removed side by side, and the lockfile and
+package.json are only touched once both are gone. A step starts as soon as
+the steps it depends on have finished. Each step's output is printed as
+one block when it completes, followed by a timeline at the end. A failed
+critical step stops the run; a failed non-critical step (the project
+tree) only prints a warning.
+
 Usage:
-    python dev/scripts/fresh-install.py
+    python dev/scripts/fresh-install.py [--fast] [--background-delete] [--profile] [--profile-trace PATH]
 """
 
+import argparse
+import hashlib
 import json
 import os
+import re
 import sys
 import shutil
+import socket
 import subprocess
 import time
 import platform
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import profiler
+from exclude_matcher import ExcludeMatcher
+from tree_core import CACHE_RELATIVE_PATH, UNICODE_STYLE, DirCache, TreeScanner, build_tree
 
 
 def print_step(message):
@@ -48,8 +81,40 @@ def print_warning(message):
     print(f"⚠️  {message}")
 
 
-TREE_EXCLUDE_DIRS = {".claude", ".next", "node_modules", ".git", "__pycache__", "dist", "build"}
+# Packages to exclude from auto-update (can cause breaking changes)
+EXCLUDED_PACKAGES = {
+    "next",           # Next.js - manual updates only
+    "react",          # React - manual updates only
+    "react-dom",      # React DOM - manual updates only
+    "typescript",     # TypeScript - manual updates only
+    "lucide-react",   # Known issues with auto-update
+}
+
+DEFAULT_REGISTRY = "https://registry.npmjs.org/"
+REGISTRY_CACHE_FILE = Path(".cache") / "npm-registry.json"
+REGISTRY_CACHE_TTL = 10 * 60  # seconds a cached latest version is used without asking the registry
+REGISTRY_JOBS = 16
+NPMRC_VARIABLE = re.compile(r"\$\{([^}]+)\}")
+# "^1.2.3", "~1.2", "1.2.3-beta.1": the only ranges rewritten to the latest version
+PLAIN_RANGE = re.compile(r"^([\^~]?)v?\d+(?:\.\d+){0,2}(?:-[0-9A-Za-z.-]+)?(?:\+[0-9A-Za-z.-]+)?$")
+
+# Dev server readiness: TCP probe interval bounds (seconds), Next.js's ready line
+PROBE_MIN_INTERVAL = 0.01
+PROBE_MAX_INTERVAL = 0.1
+READY_LINE = re.compile(r"\bReady\b")
+DEV_SERVER_OUTPUT_LINES = 200
+
+# Lives inside node_modules so deleting node_modules also invalidates it
+FINGERPRINT_FILE = Path("node_modules") / ".fresh-install-fingerprint.json"
+
+# Same filesystem as the project, so moving a directory here is one rename
+TRASH_DIR_NAME = ".fresh-install-trash"
+
+TREE_EXCLUDE_DIRS = {TRASH_DIR_NAME, ".cache", ".claude", ".next", "node_modules", ".git", "__pycache__", "dist", "build"}
 TREE_EXCLUDE_FILES = {".DS_Store", "Thumbs.db"}
+TREE_EXCLUDE_MATCHER = ExcludeMatcher(
+    [f"{name}/" for name in TREE_EXCLUDE_DIRS] + list(TREE_EXCLUDE_FILES)
+)
 
 
 def find_project_root() -> Path:
@@ -63,90 +128,315 @@ def find_project_root() -> Path:
     return script_path.parent
 
 
-def update_packages_to_latest(project_root):
-    """Update dependencies and devDependencies to their latest versions"""
-    # Packages to exclude from auto-update (can cause breaking changes)
-    EXCLUDED_PACKAGES = {
-        "next",           # Next.js - manual updates only
-        "react",          # React - manual updates only
-        "react-dom",      # React DOM - manual updates only
-        "typescript",     # TypeScript - manual updates only
-        "lucide-react",   # Known issues with auto-update
-    }
+def read_npmrc(path):
+    """Settings from one .npmrc file, with ${VAR} references expanded"""
+    settings = {}
+    try:
+        text = path.read_text()
+    except OSError:
+        return settings
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line[0] in "#;" or "=" not in line:
+            continue
+        key, value = (part.strip() for part in line.split("=", 1))
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+            value = value[1:-1]
+        settings[key] = NPMRC_VARIABLE.sub(lambda match: os.environ.get(match.group(1), ""), value)
+    return settings
+
+
+def nerf_dart(url):
+    """npm's credential key for a URL: "//host/path/" without the scheme"""
+    parts = urllib.parse.urlsplit(url)
+    return f"//{parts.netloc}{parts.path.rstrip('/')}/"
+
+
+class RegistryConfig(NamedTuple):
+    """Registries from npm's config: the default, per-scope ones and their credentials"""
+    default: str
+    scopes: Dict[str, str]
+    auth: Dict[str, str]  # nerf dart -> Authorization header
+
+    def url_for(self, name):
+        if name.startswith("@"):
+            return self.scopes.get(name.split("/", 1)[0], self.default)
+        return self.default
+
+    def authorization(self, registry):
+        """Credentials of the longest configured nerf dart the registry lives under"""
+        dart = nerf_dart(registry)
+        matches = [key for key in self.auth if dart.startswith(key)]
+        return self.auth[max(matches, key=len)] if matches else None
+
+
+def registry_config(project_root, registry=None):
+    """Read the registries npm would use, without spawning npm
+
+    The default registry comes from --registry, then npm_config_registry,
+    then the project .npmrc, then the user .npmrc ($NPM_CONFIG_USERCONFIG or
+    ~/.npmrc), then npmjs. "@scope:registry" entries route scoped packages
+    and "//host/:_authToken" / "//host/:_auth" entries supply credentials.
+    """
+    userconfig = (
+        os.environ.get("npm_config_userconfig")
+        or os.environ.get("NPM_CONFIG_USERCONFIG")
+        or Path.home() / ".npmrc"
+    )
+    settings = read_npmrc(Path(userconfig))
+    settings.update(read_npmrc(project_root / ".npmrc"))
+
+    default = (
+        registry
+        or os.environ.get("npm_config_registry")
+        or os.environ.get("NPM_CONFIG_REGISTRY")
+        or settings.get("registry")
+        or DEFAULT_REGISTRY
+    )
+    scopes = {}
+    auth = {}
+    for key, value in settings.items():
+        if key.startswith("@") and key.endswith(":registry"):
+            scopes[key[:-len(":registry")]] = value.rstrip("/") + "/"
+            continue
+        dart, _, field = key.rpartition(":")
+        if not dart.startswith("//") or not value:
+            continue
+        if field == "_authToken":
+            auth[dart.rstrip("/") + "/"] = f"Bearer {value}"
+        elif field == "_auth":
+            auth.setdefault(dart.rstrip("/") + "/", f"Basic {value}")
+    return RegistryConfig(default.rstrip("/") + "/", scopes, auth)
+
+
+def fetch_latest_version(registry, name, cached=None, authorization=None):
+    """Return (latest dist-tag, ETag) for a package from its abbreviated registry metadata"""
+    # Scoped packages are requested as @scope%2Fname
+    request = urllib.request.Request(
+        registry + urllib.parse.quote(name, safe="@"),
+        headers={"Accept": "application/vnd.npm.install-v1+json; q=1.0, application/json; q=0.8"},
+    )
+    if authorization:
+        request.add_header("Authorization", authorization)
+    if cached and cached.get("etag"):
+        request.add_header("If-None-Match", cached["etag"])
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            metadata = json.load(response)
+            return metadata["dist-tags"]["latest"], response.headers.get("ETag")
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached:
+            return cached["latest"], cached.get("etag")
+        raise
+
+
+def resolve_latest_versions(project_root, names, config):
+    """Look up the latest version of every package concurrently
+
+    Each package is looked up in the registry config routes it to. Results
+    are cached per registry in .cache/npm-registry.json: entries
+    younger than REGISTRY_CACHE_TTL are used as-is, older ones are
+    revalidated with their ETag. Returns (versions, errors) keyed by name.
+    """
+    cache_path = project_root / REGISTRY_CACHE_FILE
+    try:
+        cache = json.loads(cache_path.read_text())
+    except (OSError, ValueError):
+        cache = {}
+
+    now = time.time()
+    versions = {}
+    to_fetch = []
+    for name in names:
+        cached = cache.get(config.url_for(name), {}).get(name)
+        if cached and now - cached.get("fetched", 0) < REGISTRY_CACHE_TTL:
+            versions[name] = cached["latest"]
+        else:
+            to_fetch.append(name)
+    profiler.count("registry cache hits", len(versions))
+    profiler.count("registry lookups", len(to_fetch))
+
+    errors = {}
+    if to_fetch:
+        with ThreadPoolExecutor(max_workers=min(REGISTRY_JOBS, len(to_fetch))) as executor:
+            futures = {
+                name: executor.submit(
+                    fetch_latest_version,
+                    config.url_for(name),
+                    name,
+                    cache.get(config.url_for(name), {}).get(name),
+                    config.authorization(config.url_for(name)),
+                )
+                for name in to_fetch
+            }
+            for name, future in futures.items():
+                try:
+                    latest, etag = future.result()
+                except Exception as e:
+                    errors[name] = e
+                    continue
+                versions[name] = latest
+                cache.setdefault(config.url_for(name), {})[name] = {"latest": latest, "etag": etag, "fetched": now}
+
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps(cache, indent=1, sort_keys=True))
+    except OSError as e:
+        print_warning(f"Could not write registry cache: {e}")
+    return versions, errors
+
+
+def updated_range(spec, latest):
+    """Move a plain ^/~/exact version range to latest, keeping its prefix
+
+    Returns None for anything else (tags, git/file/npm: specs, compound
+    ranges), which is left untouched.
+    """
+    match = PLAIN_RANGE.match(spec.strip())
+    if match is None:
+        return None
+    return match.group(1) + latest
+
+
+def resolve_package_updates(project_root, registry=None):
+    """Work out the latest ranges for dependencies and devDependencies
 
+    Only reads package.json: one registry lookup per package, and the
+    updated package data is returned (None on failure) for
+    write_package_updates() to save once the old install is gone, so the
+    npm install that follows resolves the tree once.
+    """
     package_json_path = project_root / "package.json"
 
     if not package_json_path.exists():
         print_error("package.json not found - cannot update dependencies")
-        return False
+        return None
 
     try:
         with package_json_path.open() as package_file:
             package_data = json.load(package_file)
     except json.JSONDecodeError as e:
         print_error(f"Failed to parse package.json: {e}")
+        return None
+
+    sections = [package_data[key] for key in ("dependencies", "devDependencies") if package_data.get(key)]
+    excluded_found = sorted(name for packages in sections for name in packages if name in EXCLUDED_PACKAGES)
+    if excluded_found:
+        print(f"  Skipping excluded packages: {', '.join(excluded_found)}")
+    unsupported = sorted(
+        name for packages in sections for name, spec in packages.items()
+        if name not in EXCLUDED_PACKAGES and updated_range(spec, "0.0.0") is None
+    )
+    if unsupported:
+        print(f"  Leaving non-version ranges as they are: {', '.join(unsupported)}")
+
+    names = sorted({
+        name for packages in sections for name, spec in packages.items()
+        if name not in EXCLUDED_PACKAGES and updated_range(spec, "0.0.0") is not None
+    })
+    if not names:
+        print_success("No dependencies to update")
+        return {"data": package_data, "changed": 0, "total": 0}
+
+    config = registry_config(project_root, registry)
+    registries = sorted({config.url_for(name) for name in names})
+    print(f"  Resolving latest versions of {len(names)} packages from {', '.join(registries)}...")
+    versions, errors = resolve_latest_versions(project_root, names, config)
+    if errors:
+        print_error(f"Could not look up {len(errors)} packages")
+        for name, error in list(errors.items())[:20]:
+            print(f"    {name}: {error}")
+        return None
+
+    changed = 0
+    for packages in sections:
+        for name, spec in packages.items():
+            if name not in versions:
+                continue
+            new_spec = updated_range(spec, versions[name])
+            if new_spec != spec:
+                print(f"    {name}: {spec} -> {new_spec}")
+                packages[name] = new_spec
+                changed += 1
+    print_success(f"Resolved {changed} of {len(names)} packages to newer ranges")
+    return {"data": package_data, "changed": changed, "total": len(names)}
+
+
+def write_package_updates(project_root, updates):
+    """Save the package data from resolve_package_updates() to package.json"""
+    if not updates["changed"]:
+        print_success("package.json is already up to date")
+        return True
+    try:
+        (project_root / "package.json").write_text(json.dumps(updates["data"], indent=2, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print_error(f"Failed to write package.json: {e}")
         return False
+    print_success(f"Updated {updates['changed']} of {updates['total']} packages in package.json")
+    return True
 
-    dependencies = package_data.get("dependencies", {})
-    dev_dependencies = package_data.get("devDependencies", {})
 
-    def run_update(packages, is_dev=False):
-        if not packages:
-            label = "dev dependencies" if is_dev else "dependencies"
-            print_success(f"No {label} to update")
-            return True
+def tool_version(command):
+    """Return the output of `<command> --version`, or None if it cannot run"""
+    try:
+        result = subprocess.run([command, "--version"], capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
 
-        # Filter out excluded packages
-        packages_to_update = {name: version for name, version in packages.items()
-                              if name not in EXCLUDED_PACKAGES}
-        excluded_found = [name for name in packages.keys() if name in EXCLUDED_PACKAGES]
 
-        if excluded_found:
-            print(f"  Skipping excluded packages: {', '.join(excluded_found)}")
+def file_digest(path):
+    """SHA-256 of a file's contents, or None if it does not exist"""
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return None
 
-        if not packages_to_update:
-            dep_label = "dev dependencies" if is_dev else "dependencies"
-            print_success(f"No {dep_label} to update (all excluded)")
-            return True
 
-        package_specs = [f"{name}@latest" for name in packages_to_update.keys()]
-        dep_label = "dev dependencies" if is_dev else "dependencies"
-        print(f"  Updating {dep_label} to latest versions ({len(package_specs)} packages)...")
+def compute_install_fingerprint(project_root):
+    """Everything that decides what npm install puts in node_modules"""
+    return {
+        "package_json": file_digest(project_root / "package.json"),
+        "package_lock": file_digest(project_root / "package-lock.json"),
+        "node": tool_version("node"),
+        "npm": tool_version("npm"),
+        "excluded_packages": sorted(EXCLUDED_PACKAGES),
+    }
+
 
-        command = ["npm", "install"]
-        if is_dev:
-            command.append("--save-dev")
-        command.extend(package_specs)
+def read_install_fingerprint(project_root):
+    """Return the fingerprint stored by the last successful install, if any"""
+    try:
+        return json.loads((project_root / FINGERPRINT_FILE).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def write_install_fingerprint(project_root):
+    """Record the current fingerprint after a successful install"""
+    fingerprint_path = project_root / FINGERPRINT_FILE
+    try:
+        fingerprint_path.write_text(json.dumps(compute_install_fingerprint(project_root), indent=2) + "\n")
+        print_success(f"Saved install fingerprint to {FINGERPRINT_FILE}")
+    except OSError as e:
+        print_warning(f"Could not save install fingerprint: {e}")
 
-        try:
-            result = subprocess.run(
-                command,
-                cwd=project_root,
-                capture_output=True,
-                text=True
-            )
-
-            if result.returncode == 0:
-                print_success(f"Updated {dep_label}")
-                return True
-            else:
-                error_output = result.stderr.strip() or result.stdout.strip()
-                print_error(f"Failed to update {dep_label}")
-                if error_output:
-                    # Show last 20 lines of error
-                    error_lines = error_output.split('\n')
-                    relevant_errors = '\n'.join(error_lines[-20:])
-                    print(f"\nError output (last 20 lines):\n{relevant_errors}")
-                return False
-
-        except Exception as exc:
-            print_error(f"Error updating {dep_label}: {exc}")
-            return False
 
-    deps_updated = run_update(dependencies)
-    dev_deps_updated = run_update(dev_dependencies, is_dev=True)
+def install_is_current(project_root):
+    """Compare the stored fingerprint with the current one, reporting any differences"""
+    stored = read_install_fingerprint(project_root)
+    if stored is None:
+        print_warning(f"No install fingerprint at {FINGERPRINT_FILE}, running full clean install")
+        return False
+
+    current = compute_install_fingerprint(project_root)
+    changed = [key for key in current if stored.get(key) != current[key]]
+    if changed:
+        print_warning(f"Install fingerprint changed ({', '.join(changed)}), running full clean install")
+        return False
 
-    return deps_updated and dev_deps_updated
+    print_success("package.json, lockfile, Node/npm versions and exclusions unchanged")
+    return True
 
 
 def kill_port(port):
@@ -171,8 +461,66 @@ def kill_port(port):
         print_warning(f"Could not kill port {port}: {e}")
 
 
-def remove_directory(path):
-    """Remove directory if it exists"""
+def delete_in_background(paths):
+    """Delete paths in a detached process that outlives this script"""
+    command = [
+        sys.executable, "-c",
+        "import shutil, sys\nfor path in sys.argv[1:]: shutil.rmtree(path, ignore_errors=True)",
+        *[str(path) for path in paths],
+    ]
+    options = {}
+    if platform.system() == "Windows":
+        options["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        # Own session, so Ctrl+C on the dev server does not stop the deletion
+        options["start_new_session"] = True
+    subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        **options
+    )
+
+
+def reap_trash(project_root):
+    """Delete trash left behind by earlier runs in the background"""
+    trash_dir = project_root / TRASH_DIR_NAME
+    try:
+        stale = list(trash_dir.iterdir())
+    except FileNotFoundError:
+        return
+    if stale:
+        print(f"  Reaping {len(stale)} leftover item(s) in {TRASH_DIR_NAME} in the background")
+        delete_in_background(stale)
+
+
+def move_to_trash(path, project_root):
+    """Atomically rename path into the trash directory, returning its new path or None"""
+    trash_dir = project_root / TRASH_DIR_NAME
+    target = trash_dir / f"{path.name}-{datetime.now().strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+    try:
+        trash_dir.mkdir(exist_ok=True)
+        os.rename(path, target)
+    except OSError as e:
+        print_warning(f"Could not move {path} to {TRASH_DIR_NAME} ({e}), deleting in place")
+        return None
+    return target
+
+
+def remove_directory(path, project_root=None):
+    """Remove directory if it exists
+
+    With project_root, the directory is moved into the trash directory and
+    deleted in the background instead, falling back to a blocking delete.
+    """
+    if path.exists() and project_root is not None:
+        trashed = move_to_trash(path, project_root)
+        if trashed is not None:
+            delete_in_background([trashed])
+            print_success(f"Moved {path} to {TRASH_DIR_NAME}, deleting in the background")
+            return True
+
     if path.exists():
         print(f"  Removing {path}...")
         try:
@@ -256,36 +604,11 @@ def open_browser(url="http://localhost:3000"):
         print(f"  Please open manually: {url}")
 
 
-def should_exclude_from_tree(path: Path) -> bool:
-    """Return True if path should be excluded from the tree output"""
-    if path.is_dir() and path.name in TREE_EXCLUDE_DIRS:
-        return True
-    if path.is_file() and path.name in TREE_EXCLUDE_FILES:
-        return True
-    return False
-
-
-def build_tree_lines(directory: Path, prefix: str = "") -> list[str]:
-    """Recursively build tree lines for the given directory"""
-    try:
-        items = sorted(directory.iterdir(), key=lambda item: (not item.is_dir(), item.name.lower()))
-    except PermissionError:
-        return []
-
-    items = [item for item in items if not should_exclude_from_tree(item)]
-
-    lines = []
-    for index, item in enumerate(items):
-        is_last = index == len(items) - 1
-        connector = "└── " if is_last else "├── "
-        extension = "    " if is_last else "│   "
-        display_name = f"{item.name}/" if item.is_dir() else item.name
-        lines.append(f"{prefix}{connector}{display_name}")
-
-        if item.is_dir():
-            lines.extend(build_tree_lines(item, prefix + extension))
-
-    return lines
+def build_tree_lines(project_root: Path, cache: Optional[DirCache] = None) -> list[str]:
+    """Build the Unicode tree lines below project_root through the shared tree core"""
+    with TreeScanner(True, TREE_EXCLUDE_MATCHER, False, cache=cache) as scanner:
+        entries = scanner.scan(str(project_root), "")
+        return list(build_tree(entries, "", "", scanner, show_info=False, style=UNICODE_STYLE))
 
 
 def generate_project_tree(project_root: Path) -> bool:
@@ -295,8 +618,9 @@ def generate_project_tree(project_root: Path) -> bool:
 
     try:
         output_file.parent.mkdir(parents=True, exist_ok=True)
+        cache = DirCache.load(project_root / CACHE_RELATIVE_PATH)
         tree_lines = [f"{project_root.name}/"]
-        tree_lines.extend(build_tree_lines(project_root))
+        tree_lines.extend(build_tree_lines(project_root, cache=cache))
 
         excluded_dirs = ", ".join(sorted(TREE_EXCLUDE_DIRS))
         total_items = max(len(tree_lines) - 1, 0)
@@ -320,6 +644,11 @@ Excluded directories: {excluded_dirs}
         output_file.write_text(markdown)
         print_success(f"Tree generated at {output_file}")
         print(f"  Total items: {total_items}")
+        try:
+            cache.save()
+        except OSError as exc:
+            print_warning(f"Could not write directory cache: {exc}")
+        print(f"  Directory cache: {cache.summary()}")
         return True
 
     except Exception as exc:
@@ -327,12 +656,45 @@ Excluded directories: {excluded_dirs}
         return False
 
 
-def start_dev_server(project_root):
-    """Start npm run dev in background and return process"""
+def drain_output(stream, recent, ready):
+    """Read the dev server's output until it closes, so the pipe never fills up
+
+    The latest lines are kept in recent; ready is set on Next.js's "Ready" line.
+    """
+    for line in stream:
+        recent.append(line.rstrip())
+        if not ready.is_set() and READY_LINE.search(line):
+            ready.set()
+
+
+def port_is_open(port, host="127.0.0.1"):
+    """True if something accepts TCP connections on host:port"""
+    try:
+        with socket.create_connection((host, port), timeout=PROBE_MAX_INTERVAL):
+            return True
+    except OSError:
+        return False
+
+
+def print_recent_output(recent):
+    """Print the last lines the dev server wrote"""
+    if recent:
+        print(f"\nDev server output (last {len(recent)} lines):\n" + "\n".join(recent))
+
+
+def start_dev_server(project_root, recent=None, port=3000):
+    """Start npm run dev in background and return process
+
+    Readiness is detected by probing the port with a TCP connect, backing
+    off from 10ms to 100ms, or by the "Ready" line in the output, whichever
+    comes first. The output is drained by a background thread for as long
+    as the server runs, keeping the latest lines in recent.
+    """
     print("  Starting dev server (npm run dev)...")
+    recent = recent if recent is not None else deque(maxlen=DEV_SERVER_OUTPUT_LINES)
 
     try:
-        # Start dev server in background with output visible
+        started = time.perf_counter()
         process = subprocess.Popen(
             ["npm", "run", "dev"],
             cwd=project_root,
@@ -342,41 +704,41 @@ def start_dev_server(project_root):
             bufsize=1,
             universal_newlines=True
         )
+        ready_line = threading.Event()
+        drain = threading.Thread(target=drain_output, args=(process.stdout, recent, ready_line), daemon=True)
+        drain.start()
 
         print_success("Dev server starting...")
         print("  Waiting for server to be ready...")
 
         # Wait up to 30 seconds for server to start
-        max_wait = 30
-        waited = 0
-        server_ready = False
-
-        while waited < max_wait and process.poll() is None:
-            time.sleep(1)
-            waited += 1
-            # Check if port 3000 is listening
-            try:
-                result = subprocess.run(
-                    ["lsof", "-ti", ":3000"],
-                    capture_output=True,
-                    text=True,
-                    timeout=1
-                )
-                if result.stdout.strip():
-                    server_ready = True
-                    break
-            except:
-                pass
+        deadline = started + 30
+        interval = PROBE_MIN_INTERVAL
+        ready_by = None
+        while time.perf_counter() < deadline and process.poll() is None:
+            if ready_line.is_set():
+                ready_by = '"Ready" in output'
+                break
+            if port_is_open(port):
+                ready_by = f"port {port} accepting connections"
+                break
+            # Wakes early if the Ready line arrives while waiting
+            ready_line.wait(interval)
+            interval = min(interval * 2, PROBE_MAX_INTERVAL)
+        elapsed = time.perf_counter() - started
 
         if process.poll() is not None:
             print_error("Dev server process died during startup")
+            drain.join(timeout=1)  # pick up the last lines it wrote
+            print_recent_output(recent)
             return None
 
-        if server_ready:
-            print_success(f"Dev server ready (took {waited} seconds)")
+        profiler.count("dev server startup ms", round(elapsed * 1000))
+        if ready_by:
+            print_success(f"Dev server ready in {elapsed:.2f}s ({ready_by})")
             return process
         else:
-            print_warning(f"Dev server may still be starting (waited {waited}s)")
+            print_warning(f"Dev server may still be starting (waited {elapsed:.0f}s)")
             return process
 
     except Exception as e:
@@ -384,8 +746,240 @@ def start_dev_server(project_root):
         return None
 
 
+class Step(NamedTuple):
+    """One node of the fresh-install step graph"""
+    name: str
+    title: str
+    action: Callable[[], bool]
+    failure: str
+    after: Tuple[str, ...] = ()
+    critical: bool = True
+
+
+class StepResult(NamedTuple):
+    """Outcome and timing of a step that ran"""
+    ok: bool
+    started: float
+    finished: float
+    output: List[Tuple[object, str]]
+
+
+class StepOutput:
+    """Stand-in for sys.stdout/sys.stderr that buffers writes made by step threads
+
+    Concurrent steps would otherwise interleave their progress lines; each
+    step's output is replayed as one block when it finishes.
+    """
+
+    def __init__(self, stream, local):
+        self._stream = stream
+        self._local = local
+
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            return self._stream.write(text)
+        buffer.append((self._stream, text))
+        return len(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def run_step(step: Step, local, origin: float) -> StepResult:
+    """Run one step on a worker thread, capturing its output"""
+    local.buffer = []
+    started = time.perf_counter() - origin
+    try:
+        with profiler.step(step.name):
+            ok = bool(step.action())
+    except Exception as e:
+        print_error(f"{step.name}: {e}")
+        ok = False
+    finally:
+        output, local.buffer = local.buffer, None
+    return StepResult(ok, started, time.perf_counter() - origin, output)
+
+
+def run_step_graph(steps: List[Step]) -> Tuple[Dict[str, StepResult], Optional[Step]]:
+    """Run steps as soon as everything they depend on has finished
+
+    Returns the results of the steps that ran and the critical step that
+    failed, if any. After a critical failure no new steps are started, but
+    steps already running are allowed to finish.
+    """
+    names = {step.name for step in steps}
+    for step in steps:
+        unknown = [name for name in step.after if name not in names]
+        if unknown:
+            raise ValueError(f"step {step.name!r} depends on unknown steps: {', '.join(unknown)}")
+
+    local = threading.local()
+    real_stdout, real_stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = StepOutput(real_stdout, local), StepOutput(real_stderr, local)
+
+    results: Dict[str, StepResult] = {}
+    pending = list(steps)
+    running: Dict[Future, Step] = {}
+    failed: Optional[Step] = None
+    origin = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=len(steps) or 1) as executor:
+            while True:
+                if failed is None:
+                    for step in [step for step in pending if all(name in results for name in step.after)]:
+                        pending.remove(step)
+                        print(f"  ▶ {step.title}")
+                        running[executor.submit(run_step, step, local, origin)] = step
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    result = future.result()
+                    results[step.name] = result
+                    print_step(f"{step.title} ({result.finished - result.started:.1f}s)")
+                    for stream, text in result.output:
+                        stream.write(text)
+                    if result.ok:
+                        continue
+                    if step.critical:
+                        print_error(step.failure)
+                        failed = failed or step
+                    else:
+                        print_warning(f"{step.failure} (non-critical, continuing...)")
+    finally:
+        sys.stdout, sys.stderr = real_stdout, real_stderr
+
+    if failed is None and pending:
+        raise ValueError(f"step graph has a cycle through: {', '.join(step.name for step in pending)}")
+    return results, failed
+
+
+def print_timeline(steps: List[Step], results: Dict[str, StepResult], width: int = 40):
+    """Print when each step started and finished, as a bar per step"""
+    print_step("Timeline")
+    total = max((result.finished for result in results.values()), default=0.0) or 1e-9
+    name_width = max(len(step.name) for step in steps)
+    for step in sorted(steps, key=lambda s: results[s.name].started if s.name in results else float("inf")):
+        result = results.get(step.name)
+        if result is None:
+            print(f"  {step.name:<{name_width}}  {'':>7}  {'':>7}  skipped")
+            continue
+        start_col = min(int(result.started / total * width), width - 1)
+        length = max(1, round((result.finished - result.started) / total * width))
+        length = min(length, width - start_col)
+        bar = " " * start_col + "█" * length + " " * (width - start_col - length)
+        status = "ok" if result.ok else ("FAILED" if step.critical else "warning")
+        print(
+            f"  {step.name:<{name_width}}  {result.started:>6.1f}s  "
+            f"{result.finished - result.started:>6.1f}s  |{bar}| {status}"
+        )
+    print(f"  Total: {total:.1f}s")
+
+
+def kill_dev_ports():
+    """Free the ports the dev server uses"""
+    kill_port(3000)
+    kill_port(3001)
+    time.sleep(1)  # Wait a moment for processes to die
+    return True
+
+
+def install_dependencies(project_root):
+    """npm install, then record the fingerprint --fast compares against"""
+    if not run_npm_install(project_root):
+        return False
+    write_install_fingerprint(project_root)
+    return True
+
+
+def build_steps(project_root, fast_path, background_delete, state, registry=None):
+    """The fresh-install step graph; the dev server process is stored in state"""
+    trash_root = project_root if background_delete else None
+    state["dev_server_output"] = deque(maxlen=DEV_SERVER_OUTPUT_LINES)
+
+    def resolve_updates():
+        state["package_updates"] = resolve_package_updates(project_root, registry)
+        return state["package_updates"] is not None
+
+    def start_server():
+        state["dev_server"] = start_dev_server(project_root, state["dev_server_output"])
+        return state["dev_server"] is not None
+
+    steps = [
+        Step("kill ports", "Killing processes on ports 3000 and 3001", kill_dev_ports,
+             "Failed to free ports 3000 and 3001"),
+    ]
+    server_after = ["kill ports"]
+    if not fast_path:
+        # A dev server still running could write into these while they are deleted
+        steps += [
+            Step("remove .next", "Removing .next directory",
+                 lambda: remove_directory(project_root / ".next", trash_root),
+                 "Failed to remove .next directory", after=("kill ports",)),
+            Step("remove node_modules", "Removing node_modules directory",
+                 lambda: remove_directory(project_root / "node_modules", trash_root),
+                 "Failed to remove node_modules directory", after=("kill ports",)),
+            Step("remove package-lock.json", "Removing package-lock.json",
+                 lambda: remove_file(project_root / "package-lock.json"),
+                 "Failed to remove package-lock.json",
+                 # Keep the lockfile until the project is known to be resettable
+                 after=("remove .next", "remove node_modules")),
+            # Only reads package.json, so the registry lookups overlap the removals
+            Step("resolve dependencies", "Resolving latest dependency versions", resolve_updates,
+                 "Failed to resolve latest dependency versions"),
+            Step("update dependencies", "Updating dependencies to latest versions",
+                 lambda: write_package_updates(project_root, state["package_updates"]),
+                 "Failed to update dependencies to latest versions",
+                 after=("resolve dependencies", "remove .next", "remove node_modules",
+                        "remove package-lock.json")),
+            Step("npm install", "Running npm install",
+                 lambda: install_dependencies(project_root),
+                 "Failed to install dependencies",
+                 after=("update dependencies", "remove node_modules", "remove package-lock.json")),
+        ]
+        server_after += ["remove .next", "npm install"]
+    steps += [
+        # Walks the project but skips .next and node_modules, so it needs nothing else
+        Step("project tree", "Generating project tree",
+             lambda: generate_project_tree(project_root),
+             "Failed to generate project tree", critical=False),
+        Step("start dev server", "Starting dev server", start_server,
+             "Failed to start dev server", after=tuple(server_after)),
+        Step("open browser", "Opening browser in Chrome incognito window",
+             lambda: open_browser("http://localhost:3000") or True,
+             "Failed to open browser", after=("start dev server",)),
+    ]
+    return steps
+
+
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="Clean reinstall of the Next.js project and start the dev server.")
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Skip the delete/update/install steps when the dependency fingerprint is unchanged",
+    )
+    parser.add_argument(
+        "--background-delete",
+        action="store_true",
+        help=f"Rename .next and node_modules into {TRASH_DIR_NAME} and delete them in a detached process",
+    )
+    parser.add_argument(
+        "--registry",
+        default=None,
+        help=f"npm registry to look up latest versions in (default: $npm_config_registry, .npmrc or {DEFAULT_REGISTRY})",
+    )
+    profiler.add_arguments(parser)
+    args = parser.parse_args()
+    profiler.start(args)
+
     print("\n" + "="*60)
     print("🚀 Next.js Fresh Install Script")
     print("="*60)
@@ -395,6 +989,7 @@ def main():
     os.chdir(project_root)
 
     print(f"\n📁 Project directory: {project_root}")
+    reap_trash(project_root)
 
     # No confirmation - just run automatically
     print("\n🚀 Starting fresh install process...")
@@ -409,63 +1004,26 @@ def main():
     print("  - Open browser in Chrome incognito window")
     print()
     print("⚠️  Critical packages excluded from auto-update:")
-    print("    next, react, react-dom, typescript, lucide-react")
+    print(f"    {', '.join(sorted(EXCLUDED_PACKAGES))}")
     print()
 
-    # Step 1: Kill ports
-    print_step("Step 1: Killing processes on ports 3000 and 3001")
-    kill_port(3000)
-    kill_port(3001)
-    time.sleep(1)  # Wait a moment for processes to die
-
-    # Step 2: Remove .next directory
-    print_step("Step 2: Removing .next directory")
-    next_dir = project_root / ".next"
-    if not remove_directory(next_dir):
-        print_error("Failed to remove .next directory")
-        sys.exit(1)
-
-    # Step 3: Remove node_modules directory
-    print_step("Step 3: Removing node_modules directory")
-    node_modules = project_root / "node_modules"
-    if not remove_directory(node_modules):
-        print_error("Failed to remove node_modules directory")
-        sys.exit(1)
-
-    # Step 4: Remove package-lock.json
-    print_step("Step 4: Removing package-lock.json")
-    package_lock = project_root / "package-lock.json"
-    if not remove_file(package_lock):
-        print_error("Failed to remove package-lock.json")
-        sys.exit(1)
-
-    # Step 5: Update dependencies to latest versions
-    print_step("Step 5: Updating dependencies to latest versions")
-    if not update_packages_to_latest(project_root):
-        print_error("Failed to update dependencies to latest versions")
-        sys.exit(1)
-
-    # Step 6: Run npm install
-    print_step("Step 6: Running npm install")
-    if not run_npm_install(project_root):
-        print_error("Failed to install dependencies")
-        sys.exit(1)
-
-    # Step 7: Generate project tree
-    print_step("Step 7: Generating project tree")
-    if not generate_project_tree(project_root):
-        print_warning("Failed to generate project tree (non-critical, continuing...)")
-
-    # Step 8: Start dev server
-    print_step("Step 8: Starting dev server")
-    dev_server_process = start_dev_server(project_root)
-    if not dev_server_process:
-        print_error("Failed to start dev server")
+    fast_path = False
+    if args.fast:
+        print_step("Checking install fingerprint (--fast)")
+        with profiler.step("check fingerprint"):
+            fast_path = install_is_current(project_root)
+
+    # Run the steps, independent ones concurrently
+    state = {}
+    if fast_path:
+        print("  Skipping the clean install (install fingerprint matches)")
+    steps = build_steps(project_root, fast_path, args.background_delete, state, args.registry)
+    results, failed = run_step_graph(steps)
+    print_timeline(steps, results)
+    if failed is not None:
+        profiler.finish(args)
         sys.exit(1)
-
-    # Step 9: Open browser
-    print_step("Step 9: Opening browser in Chrome incognito window")
-    open_browser("http://localhost:3000")
+    dev_server_process = state["dev_server"]
 
     # Success
     print("\n" + "="*60)
@@ -475,6 +1033,7 @@ def main():
     print("🌐 Browser should open automatically")
     print("\nPress Ctrl+C to stop the dev server")
     print()
+    profiler.finish(args)
 
     # Keep script running and monitor dev server
     try:
@@ -483,6 +1042,7 @@ def main():
             if dev_server_process.poll() is not None:
                 print_error("\n⚠️  Dev server process stopped unexpectedly!")
                 print(f"Exit code: {dev_server_process.returncode}")
+                print_recent_output(state["dev_server_output"])
                 sys.exit(1)
             time.sleep(1)
     except KeyboardInterrupt:
@@ -1,119 +1,77 @@
 #!/usr/bin/env python3
-"""Generate an ASCII project tree for selected paths and save it as markdown."""
+"""Generate an ASCII project tree for selected paths and save it as markdown or JSON.
+
+``--diff OTHER`` instead prints what changed between OTHER (a directory or a
+``--format json``/``ndjson`` snapshot) and the current tree.
+
+The walking, caching and rendering live in tree_core.py; this is the CLI.
+"""
 from __future__ import annotations
 
 import argparse
+import os
+import sys
+from itertools import chain
 from pathlib import Path
-from typing import Iterable, List, Set
-
-
-def format_size(size: int) -> str:
-    """Format file size in human-readable format."""
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size < 1024.0:
-            return f"{size:.1f}{unit}".rjust(8)
-        size /= 1024.0
-    return f"{size:.1f}TB".rjust(8)
-
-
-def count_items(directory: Path, show_hidden: bool, exclude: Set[str]) -> int:
-    """Count items in a directory."""
-    count = 0
-    for entry in directory.iterdir():
-        name = entry.name
-        if not show_hidden and name.startswith("."):
-            continue
-        if name in exclude:
-            continue
-        count += 1
-    return count
-
-
-def list_entries(directory: Path, show_hidden: bool, exclude: Set[str]) -> List[Path]:
-    entries: List[Path] = []
-    for entry in directory.iterdir():
-        name = entry.name
-        if not show_hidden and name.startswith("."):
-            continue
-        if name in exclude:
-            continue
-        entries.append(entry)
-    return sorted(entries, key=lambda p: (p.is_file(), p.name.lower()))
-
-
-def build_tree(directory: Path, prefix: str, show_hidden: bool, exclude: Set[str], show_info: bool) -> List[str]:
-    lines: List[str] = []
-    entries = list_entries(directory, show_hidden, exclude)
-    for idx, entry in enumerate(entries):
-        is_last = idx == len(entries) - 1
-        connector = "`-- " if is_last else "|-- "
-        next_prefix = "    " if is_last else "|   "
-
-        if entry.is_dir():
-            if show_info:
-                item_count = count_items(entry, show_hidden, exclude)
-                info = f"[DIR] ({item_count:3d} items) "
-                lines.append(f"{prefix}{connector}{info}{entry.name}/")
-            else:
-                lines.append(f"{prefix}{connector}{entry.name}/")
-            lines.extend(build_tree(entry, prefix + next_prefix, show_hidden, exclude, show_info))
-        else:
-            if show_info:
-                try:
-                    size = entry.stat().st_size
-                    size_str = format_size(size)
-                    info = f"[FILE] {size_str} "
-                    lines.append(f"{prefix}{connector}{info}{entry.name}")
-                except OSError:
-                    lines.append(f"{prefix}{connector}[FILE] (error)   {entry.name}")
-            else:
-                lines.append(f"{prefix}{connector}{entry.name}")
-    return lines
-
-
-def generate_tree(root: Path, include: Iterable[str], show_hidden: bool, exclude: Iterable[str], show_info: bool) -> List[str]:
-    lines: List[str] = []
-    exclude_set = set(exclude)
-
-    include_paths = list(include)
-    for idx, rel_path in enumerate(include_paths):
-        target = (root / rel_path).resolve()
-        try:
-            target.relative_to(root.resolve())
-        except ValueError:
-            raise ValueError(f"Include path '{rel_path}' must be inside the root directory")
-
-        if not target.exists():
-            lines.append(f"{rel_path} (missing)")
-        elif target.is_dir():
-            if show_info:
-                item_count = count_items(target, show_hidden, exclude_set)
-                info = f"[DIR] ({item_count:3d} items) "
-                lines.append(f"{info}{rel_path.rstrip('/')}/")
-            else:
-                lines.append(f"{rel_path.rstrip('/')}/")
-            lines.extend(build_tree(target, prefix="", show_hidden=show_hidden, exclude=exclude_set, show_info=show_info))
-        else:
-            if show_info:
-                try:
-                    size = target.stat().st_size
-                    size_str = format_size(size)
-                    info = f"[FILE] {size_str} "
-                    lines.append(f"{info}{rel_path.rstrip('/')}")
-                except OSError:
-                    lines.append(f"[FILE] (error)   {rel_path.rstrip('/')}")
-            else:
-                lines.append(rel_path.rstrip('/'))
+from typing import Iterable, Optional, TextIO
+
+import profiler
+from git_index import GitIndexError, list_files
+from tree_core import (
+    CACHE_RELATIVE_PATH,
+    STYLES,
+    DirCache,
+    ListingSource,
+    PathListing,
+    collect_nodes,
+    diff_trees,
+    generate_tree,
+    limit_lines,
+    load_snapshot,
+    ndjson_truncated,
+    render_json,
+    render_ndjson,
+    walk_nodes,
+    write_lines,
+)
+
+OUTPUT_FORMATS = {"markdown": "md", "json": "json", "ndjson": "ndjson"}
+
+
+def save_cache(cache: Optional[ListingSource], report: TextIO) -> None:
+    if not isinstance(cache, DirCache):
+        return
+    try:
+        cache.save()
+    except OSError as exc:
+        print(f"Could not write directory cache {cache.path}: {exc}", file=report)
+    print(f"Directory cache: {cache.summary()}", file=report)
+
 
-        if idx != len(include_paths) - 1:
-            lines.append("")
-    return lines
+def write_output(output_path: Path, document: Iterable[str]) -> None:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if output_path.exists() and not output_path.is_file():
+        # Devices and pipes (e.g. /dev/null) are written in place
+        with output_path.open("w", encoding="utf-8") as handle:
+            write_lines(handle, document)
+        return
+
+    # Stream into a sibling temp file so an interrupted run never leaves a
+    # truncated tree behind
+    temp_path = output_path.with_name(f".{output_path.name}.tmp")
+    try:
+        with temp_path.open("w", encoding="utf-8") as handle:
+            write_lines(handle, document)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
 
 
 def main() -> None:
     project_root = Path(__file__).resolve().parents[3]
 
-    parser = argparse.ArgumentParser(description="Generate a markdown project tree for selected paths.")
+    parser = argparse.ArgumentParser(description="Generate a markdown or JSON project tree for selected paths.")
     parser.add_argument(
         "--root",
         type=Path,
@@ -130,13 +88,26 @@ def main() -> None:
         "--exclude",
         nargs="+",
         default=["node_modules", ".git", ".next"],
-        help="Entry names to exclude anywhere in the tree",
+        help="Exclude patterns with .gitignore semantics (plain names match anywhere in the tree)",
     )
     parser.add_argument(
         "--output",
         type=Path,
         default=None,
-        help="Output markdown file (default: dev/project-tree.md under the root)",
+        help="Output file, or - for stdout (default: developer/project-tree.<md|json|ndjson> under the root)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="markdown",
+        help="markdown tree, one JSON document, or NDJSON nodes in post-order (JSON nodes carry sizes, mtimes and recursive totals)",
+    )
+    parser.add_argument(
+        "--diff",
+        type=Path,
+        default=None,
+        metavar="OTHER",
+        help="Show added, removed and modified entries relative to OTHER: a directory or a json/ndjson snapshot (default output: stdout)",
     )
     parser.add_argument(
         "--show-hidden",
@@ -148,30 +119,159 @@ def main() -> None:
         action="store_true",
         help="Show file sizes and directory item counts",
     )
+    parser.add_argument(
+        "--style",
+        choices=sorted(STYLES),
+        default="ascii",
+        help="Connector style for the markdown tree (default: ascii)",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=None,
+        help="Do not descend below this many levels under each include path",
+    )
+    parser.add_argument(
+        "--max-entries-per-dir",
+        type=int,
+        default=None,
+        help="Show at most this many entries per directory, collapsing the rest into '… N more'",
+    )
+    parser.add_argument(
+        "--max-total-lines",
+        type=int,
+        default=None,
+        help="Stop the walk after this many tree lines (markdown and ndjson)",
+    )
+    parser.add_argument(
+        "--from-git",
+        action="store_true",
+        help="List tracked and untracked non-ignored files from the git index instead of walking the tree",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Re-list every directory instead of reusing {CACHE_RELATIVE_PATH} from the last run",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="List directories concurrently with this many threads (output is unchanged; helps on network mounts)",
+    )
+    profiler.add_arguments(parser)
 
     args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    for option in ("max_depth", "max_entries_per_dir", "max_total_lines"):
+        value = getattr(args, option)
+        if value is not None and value < (0 if option == "max_depth" else 1):
+            parser.error(f"--{option.replace('_', '-')} is out of range: {value}")
+    if args.diff is not None:
+        if args.format != "markdown":
+            parser.error("--diff writes a text tree; it cannot be combined with --format json/ndjson")
+        if args.max_entries_per_dir is not None:
+            parser.error("--diff needs complete directories; drop --max-entries-per-dir")
+        if not args.diff.exists():
+            parser.error(f"--diff: {args.diff} does not exist")
     root = args.root.resolve()
-    output_path = args.output or (root / "developer" / "project-tree.md")
-
-    tree_lines = generate_tree(root, args.include, args.show_hidden, args.exclude, args.show_info)
+    to_stdout = str(args.output) == "-" or (args.diff is not None and args.output is None)
+    output_path = args.output or (root / "developer" / f"project-tree.{OUTPUT_FORMATS[args.format]}")
+    report = sys.stderr if to_stdout else sys.stdout
+    profiler.start(args)
 
-    header = [
-        "# Project Tree",
-        "",
-        f"root: {root}",
-        f"include: {', '.join(args.include)}",
-        f"exclude: {', '.join(args.exclude) if args.exclude else '(none)'}",
-    ]
-    if args.show_info:
-        header.append("info: [FILE/DIR] size/count")
-    header.extend(["", "```"])
+    cache: Optional[ListingSource] = None
+    if args.from_git:
+        with profiler.step("read git index"):
+            try:
+                cache = PathListing(root, list_files(root))
+            except GitIndexError as e:
+                parser.error(f"--from-git: {e}")
+        profiler.count("files listed from git", cache.file_count)
+        print(f"Listed {cache.file_count} files from the git index", file=report)
+    elif not args.no_cache:
+        with profiler.step("load dir cache"):
+            cache = DirCache.load(root / CACHE_RELATIVE_PATH)
+    if args.diff is not None:
+        if args.diff.is_dir():
+            other = args.diff.resolve()
+            with profiler.step("walk old tree"):
+                old_roots = collect_nodes(
+                    walk_nodes(other, args.include, args.show_hidden, args.exclude, args.jobs, None, args.max_depth)
+                )
+        else:
+            other = args.diff
+            with profiler.step("load snapshot"):
+                try:
+                    old_roots = load_snapshot(other)
+                except (OSError, ValueError, KeyError) as e:
+                    parser.error(f"--diff: cannot read snapshot {other}: {e}")
+        with profiler.step("walk tree"):
+            new_roots = collect_nodes(
+                walk_nodes(root, args.include, args.show_hidden, args.exclude, args.jobs, cache, args.max_depth)
+            )
+        header = [
+            "# Project Tree Diff",
+            "",
+            f"old: {other}",
+            f"new: {root}",
+            f"include: {', '.join(args.include)}",
+            "",
+            "```",
+        ]
+        diff_lines = diff_trees(old_roots, new_roots, STYLES[args.style])
+        document = chain(header, limit_lines(diff_lines, args.max_total_lines), ["```"])
+    elif args.format == "markdown":
+        header = [
+            "# Project Tree",
+            "",
+            f"root: {root}",
+            f"include: {', '.join(args.include)}",
+            f"exclude: {', '.join(args.exclude) if args.exclude else '(none)'}",
+        ]
+        if args.show_info:
+            header.append("info: [FILE/DIR] size/count")
+        header.extend(["", "```"])
 
-    footer = ["```", ""]
+        footer = ["```"]
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text("\n".join(header + tree_lines + footer))
+        tree_lines = generate_tree(
+            root,
+            args.include,
+            args.show_hidden,
+            args.exclude,
+            args.show_info,
+            args.jobs,
+            cache,
+            args.max_depth,
+            args.max_entries_per_dir,
+            STYLES[args.style],
+        )
+        document = chain(header, limit_lines(tree_lines, args.max_total_lines), footer)
+    else:
+        events = walk_nodes(
+            root, args.include, args.show_hidden, args.exclude, args.jobs, cache, args.max_depth, args.max_entries_per_dir
+        )
+        if args.format == "json":
+            # A truncated JSON document would not parse, so the line limit does not apply
+            meta = {"root": str(root), "include": args.include, "exclude": args.exclude}
+            document = render_json(events, meta)
+        else:
+            notice = ndjson_truncated(args.max_total_lines) if args.max_total_lines is not None else None
+            document = limit_lines(render_ndjson(events), args.max_total_lines, notice)
 
-    print(f"Wrote tree to {output_path}")
+    # The walk is lazy, so this step covers walking as well as writing
+    with profiler.step("walk and write"):
+        if to_stdout:
+            write_lines(sys.stdout, document)
+        else:
+            write_output(output_path, document)
+    if not to_stdout:
+        print(f"Wrote tree to {output_path}")
+    with profiler.step("save dir cache"):
+        save_cache(cache, report)
+    profiler.finish(args, report)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,179 @@
+"""List a checkout's files from the git index instead of walking the tree.
+
+Tracked paths are parsed straight out of ``.git/index`` (versions 2, 3 and 4,
+SHA-1 or SHA-256 repositories). A single ``git ls-files`` call then adds
+untracked files that are not ignored and drops tracked files deleted from
+the worktree, so ignored trees such as node_modules and .next are never
+visited at all.
+"""
+from __future__ import annotations
+
+import os
+import re
+import struct
+import subprocess
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+
+INDEX_SIGNATURE = b"DIRC"
+SUPPORTED_VERSIONS = (2, 3, 4)
+# ctime, mtime (seconds + nanoseconds), dev, ino, mode, uid, gid, size
+STAT_FIELDS = struct.Struct(">10I")
+MODE_OFFSET = 24
+GITLINK_MODE = 0o160000
+DIRECTORY_MODE = 0o040000
+FLAG_EXTENDED = 0x4000
+FLAG_STAGE_SHIFT = 12
+
+
+class GitIndexError(Exception):
+    """The checkout cannot be listed from its git index."""
+
+
+def find_repository(path: Path) -> Optional[Tuple[Path, Path]]:
+    """Return (worktree top, git dir) for the checkout containing path."""
+    path = path.resolve()
+    for candidate in (path, *path.parents):
+        dot_git = candidate / ".git"
+        if dot_git.is_dir():
+            return candidate, dot_git
+        if dot_git.is_file():
+            # Linked worktrees and submodules: ".git" is a "gitdir: <path>" file
+            content = dot_git.read_text(encoding="utf-8", errors="replace").strip()
+            if content.startswith("gitdir:"):
+                git_dir = Path(content[len("gitdir:"):].strip())
+                return candidate, (candidate / git_dir).resolve()
+    return None
+
+
+def _hash_size(git_dir: Path) -> int:
+    config_dirs = [git_dir]
+    commondir = git_dir / "commondir"
+    if commondir.is_file():
+        config_dirs.append((git_dir / commondir.read_text().strip()).resolve())
+    for directory in config_dirs:
+        try:
+            config = (directory / "config").read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            continue
+        if re.search(r"^\s*objectformat\s*=\s*sha256\s*$", config, re.IGNORECASE | re.MULTILINE):
+            return 32
+    return 20
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Decode git's offset varint (index v4 path prefix lengths)."""
+    byte = data[pos]
+    pos += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, pos
+
+
+def read_index(git_dir: Path) -> List[str]:
+    """Return the worktree-relative POSIX paths of the files in git_dir/index.
+
+    Conflicted paths are reported once. Submodules (gitlinks) and sparse
+    directory entries are skipped, since they have no file content of their
+    own in this checkout.
+    """
+    try:
+        data = (git_dir / "index").read_bytes()
+    except FileNotFoundError:
+        return []  # fresh repository, nothing staged yet
+    except OSError as e:
+        raise GitIndexError(f"cannot read git index: {e}") from e
+
+    if len(data) < 12 or data[:4] != INDEX_SIGNATURE:
+        raise GitIndexError("not a git index file")
+    version, count = struct.unpack_from(">II", data, 4)
+    if version not in SUPPORTED_VERSIONS:
+        raise GitIndexError(f"unsupported git index version {version}")
+
+    hash_size = _hash_size(git_dir)
+    flags_offset = STAT_FIELDS.size + hash_size
+    paths: List[str] = []
+    previous = b""
+    pos = 12
+    try:
+        for _ in range(count):
+            start = pos
+            mode = struct.unpack_from(">I", data, start + MODE_OFFSET)[0]
+            flags = struct.unpack_from(">H", data, start + flags_offset)[0]
+            pos = start + flags_offset + 2
+            if version >= 3 and flags & FLAG_EXTENDED:
+                pos += 2
+
+            if version == 4:
+                strip, pos = _read_varint(data, pos)
+                end = data.index(b"\0", pos)
+                name = previous[:len(previous) - strip] + data[pos:end]
+                pos = end + 1
+            else:
+                end = data.index(b"\0", pos)
+                name = data[pos:end]
+                # Entries are NUL-padded to a multiple of eight bytes
+                pos = start + ((end - start + 8) & ~7)
+            previous = name
+
+            object_type = mode & 0o170000
+            if object_type in (GITLINK_MODE, DIRECTORY_MODE):
+                continue
+            if (flags >> FLAG_STAGE_SHIFT) & 0x3 and paths and paths[-1] == os.fsdecode(name):
+                continue  # later stages of a conflicted path
+            paths.append(os.fsdecode(name))
+    except (struct.error, ValueError, IndexError) as e:
+        raise GitIndexError("truncated or corrupt git index") from e
+    return paths
+
+
+def worktree_changes(top: Path, prefix: str = "") -> Tuple[List[str], Set[str]]:
+    """Return (untracked files that are not ignored, tracked files deleted from disk).
+
+    One ``git ls-files`` call answers both: ``-t`` tags untracked files "?"
+    and deleted ones "R".
+    """
+    command = ["git", "ls-files", "-z", "-t", "--others", "--deleted", "--exclude-standard"]
+    if prefix:
+        command += ["--", prefix]
+    try:
+        result = subprocess.run(command, cwd=top, capture_output=True, check=True)
+    except FileNotFoundError as e:
+        raise GitIndexError("git is not installed") from e
+    except subprocess.CalledProcessError as e:
+        raise GitIndexError(e.stderr.decode(errors="replace").strip() or "git ls-files failed") from e
+
+    untracked: List[str] = []
+    deleted: Set[str] = set()
+    for record in result.stdout.split(b"\0"):
+        if len(record) < 3:
+            continue
+        tag, path = record[:1], os.fsdecode(record[2:])
+        if tag == b"?":
+            untracked.append(path)
+        elif tag == b"R":
+            deleted.add(path)
+    return untracked, deleted
+
+
+def list_files(path: Path) -> List[str]:
+    """Return the sorted POSIX paths, relative to path, of every file git would see.
+
+    That is the tracked files still present plus untracked files that are
+    not ignored. Raises GitIndexError if path is not inside a git checkout.
+    """
+    path = path.resolve()
+    repository = find_repository(path)
+    if repository is None:
+        raise GitIndexError(f"{path} is not inside a git checkout")
+    top, git_dir = repository
+    prefix = path.relative_to(top).as_posix()
+    prefix = "" if prefix == "." else prefix + "/"
+
+    untracked, deleted = worktree_changes(top, prefix)
+    files: Set[str] = set(untracked)
+    files.update(p for p in read_index(git_dir) if p not in deleted and p.startswith(prefix))
+    return sorted(p[len(prefix):] for p in files if p.startswith(prefix))
@@ -0,0 +1,224 @@
+"""Opt-in step timing shared by the dev scripts' ``--profile`` flag.
+
+Scripts wrap their phases in ``with step("name"):`` and bump counters such
+as files walked or bytes copied with ``count("name", n)``. Both are no-ops
+until ``enable()`` is called, so the instrumentation left in hot paths
+costs one global check when profiling is off.
+
+Steps nest into a tree recording wall-clock time, CPU time of this process
+(all threads, so steps that overlap share it) and CPU time of child
+processes reaped inside the step, so ``npm install`` shows up even though
+it runs outside Python. Steps may run concurrently on worker threads; each
+thread nests its steps under whatever step the main thread had open. ``report()``
+prints the tree as a table; ``write_trace()`` saves Chrome trace-event JSON
+that chrome://tracing or https://ui.perfetto.dev can open, which makes runs
+easy to compare side by side.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, TextIO
+
+
+class Step:
+    """One timed phase with its counters and nested steps."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.counters: Dict[str, int] = {}
+        self.children: List[Step] = []
+        self.thread = threading.get_ident()
+        self.thread_name = threading.current_thread().name
+        self.start = time.perf_counter()
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.child_cpu = 0.0
+        self._cpu_start = time.process_time()
+        self._child_start = _children_cpu()
+
+    def close(self) -> None:
+        self.wall = time.perf_counter() - self.start
+        self.cpu = time.process_time() - self._cpu_start
+        self.child_cpu = _children_cpu() - self._child_start
+
+    def totals(self) -> Dict[str, int]:
+        """Counters of this step and everything below it."""
+        totals = dict(self.counters)
+        for child in self.children:
+            for name, value in child.totals().items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+
+def _children_cpu() -> float:
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+class Profile:
+    """The step tree of one script run."""
+
+    def __init__(self, name: str):
+        self.root = Step(name)
+        self._main = threading.get_ident()
+        # Open steps per thread; threads without any count into the main thread's
+        self._stacks: Dict[int, List[Step]] = {self._main: [self.root]}
+        self._lock = threading.Lock()
+
+    def _current(self) -> Step:
+        stack = self._stacks.get(threading.get_ident()) or self._stacks[self._main]
+        return stack[-1]
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[Step]:
+        current = Step(name)
+        thread = threading.get_ident()
+        with self._lock:
+            parent = self._current()
+            parent.children.append(current)
+            self._stacks.setdefault(thread, []).append(current)
+        try:
+            yield current
+        finally:
+            current.close()
+            with self._lock:
+                stack = self._stacks[thread]
+                stack.remove(current)
+                if not stack:
+                    del self._stacks[thread]
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            counters = self._current().counters
+            counters[name] = counters.get(name, 0) + amount
+
+    def finish(self) -> None:
+        if self.root.wall == 0.0:
+            self.root.close()
+
+    def report(self, stream: TextIO) -> None:
+        """Print the step tree as a table, then the counter totals."""
+        self.finish()
+        total = self.root.wall or 1e-9
+        rows = []
+        pending = [(self.root, 0)]
+        while pending:
+            current, depth = pending.pop()
+            rows.append((current, depth))
+            pending.extend((child, depth + 1) for child in reversed(current.children))
+
+        width = max(len("  " * depth + current.name) for current, depth in rows)
+        print(f"\n{'step':<{width}}  {'wall':>9}  {'cpu':>9}  {'child cpu':>9}  {'%':>5}  counters", file=stream)
+        for current, depth in rows:
+            counters = ", ".join(f"{name}={value:,}" for name, value in current.counters.items())
+            line = (
+                f"{'  ' * depth + current.name:<{width}}  {current.wall * 1000:>7.0f}ms  "
+                f"{current.cpu * 1000:>7.0f}ms  {current.child_cpu * 1000:>7.0f}ms  "
+                f"{current.wall / total * 100:>5.1f}  {counters}"
+            )
+            print(line.rstrip(), file=stream)
+        totals = self.root.totals()
+        if totals:
+            print("totals: " + ", ".join(f"{name}={value:,}" for name, value in totals.items()), file=stream)
+
+    def write_trace(self, path: Path) -> None:
+        """Write the steps as Chrome trace-event JSON (complete "X" events).
+
+        Each step is placed on the track of the thread that opened it.
+        """
+        self.finish()
+        pid = os.getpid()
+        origin = self.root.start
+        events = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": self.root.thread, "args": {"name": self.root.name}}
+        ]
+        threads: Dict[int, str] = {}
+        pending = [self.root]
+        while pending:
+            current = pending.pop()
+            threads.setdefault(current.thread, current.thread_name)
+            events.append({
+                "name": current.name,
+                "ph": "X",
+                "pid": pid,
+                "tid": current.thread,
+                "ts": round((current.start - origin) * 1e6),
+                "dur": round(current.wall * 1e6),
+                "args": {
+                    "cpu_ms": round(current.cpu * 1000, 3),
+                    "child_cpu_ms": round(current.child_cpu * 1000, 3),
+                    **current.counters,
+                },
+            })
+            pending.extend(current.children)
+        events.extend(
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": thread, "args": {"name": name}}
+            for thread, name in threads.items()
+        )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+
+
+_active: Optional[Profile] = None
+
+
+def enable(name: Optional[str] = None) -> Profile:
+    """Start recording; until this is called step() and count() do nothing."""
+    global _active
+    _active = Profile(name or Path(sys.argv[0]).name)
+    return _active
+
+
+@contextmanager
+def step(name: str) -> Iterator[Optional[Step]]:
+    if _active is None:
+        yield None
+        return
+    with _active.step(name) as current:
+        yield current
+
+
+def count(name: str, amount: int = 1) -> None:
+    if _active is not None:
+        _active.count(name, amount)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print a per-step wall/CPU timing table with counters when done",
+    )
+    parser.add_argument(
+        "--profile-trace",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help="Also write the steps as Chrome trace-event JSON (implies --profile)",
+    )
+
+
+def start(args: argparse.Namespace) -> None:
+    """Enable profiling if the parsed arguments ask for it."""
+    if args.profile or args.profile_trace:
+        enable()
+
+
+def finish(args: argparse.Namespace, stream: TextIO = sys.stdout) -> None:
+    """Print the report and write the trace requested on the command line."""
+    if _active is None:
+        return
+    _active.report(stream)
+    if args.profile_trace:
+        try:
+            _active.write_trace(args.profile_trace)
+            print(f"Wrote Chrome trace to {args.profile_trace}", file=stream)
+        except OSError as exc:
+            print(f"Could not write trace {args.profile_trace}: {exc}", file=stream)
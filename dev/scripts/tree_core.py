@@ -0,0 +1,789 @@
+"""Shared directory-tree core for the dev scripts.
+
+One scandir-based walker feeds every output: ASCII or Unicode text trees
+(``build_tree`` / ``generate_tree`` with a ``TreeStyle``) and JSON/NDJSON
+node streams (``walk_nodes`` with ``render_json`` / ``render_ndjson``).
+Directory listings can be served from a persistent ``DirCache`` and read
+ahead on a thread pool by ``TreeScanner``; exclusions use the compiled
+``ExcludeMatcher``. generate_tree.py is the CLI over this module and
+fresh-install.py renders its project tree through it in-process.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from stat import S_ISDIR
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, TextIO, Tuple, Union
+
+import profiler
+from exclude_matcher import ExcludeMatcher
+
+
+def format_size(size: int) -> str:
+    """Format file size in human-readable format."""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024.0:
+            return f"{size:.1f}{unit}".rjust(8)
+        size /= 1024.0
+    return f"{size:.1f}TB".rjust(8)
+
+
+DIR_KIND, FILE_KIND, OTHER_KIND = "d", "f", "o"
+CACHE_VERSION = 1
+CACHE_RELATIVE_PATH = Path(".cache") / "project-tree.json"
+
+
+class TreeStyle(NamedTuple):
+    """Connector strings for text trees."""
+
+    branch: str
+    last: str
+    pipe: str
+    space: str = "    "
+
+
+ASCII_STYLE = TreeStyle("|-- ", "`-- ", "|   ")
+UNICODE_STYLE = TreeStyle("├── ", "└── ", "│   ")
+STYLES = {"ascii": ASCII_STYLE, "unicode": UNICODE_STYLE}
+
+
+class TreeEntry(NamedTuple):
+    """A visible directory entry, ready to render."""
+
+    name: str
+    path: str
+    is_dir: bool
+    size: Optional[int]  # None when sizes were not requested or stat failed
+    mtime: Optional[float] = None
+
+
+def read_listing(directory: str) -> List[Tuple[str, str]]:
+    """Return ``(name, kind)`` for every entry with one scandir pass.
+
+    Kinds come from the d_type scandir already returned, so only symlinks
+    cost an extra stat (to see what they point at).
+    """
+    listing: List[Tuple[str, str]] = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            try:
+                if entry.is_dir():
+                    kind = DIR_KIND
+                elif entry.is_file():
+                    kind = FILE_KIND
+                else:
+                    kind = OTHER_KIND
+            except OSError:
+                kind = OTHER_KIND
+            listing.append((entry.name, kind))
+    return listing
+
+
+class DirCache:
+    """Directory listings persisted between runs, validated by directory mtime.
+
+    A directory's mtime changes whenever an entry is added, removed or
+    renamed, so a matching mtime means the cached listing is still exact and
+    the directory costs one stat instead of a full read. File contents are
+    not cached; sizes are always stat'ed fresh.
+    """
+
+    # Listings of directories modified this recently are not stored: a change
+    # within the same mtime tick right after reading would go unnoticed.
+    racy_window_ns = 2_000_000_000
+
+    def __init__(self, path: Path, dirs: Optional[Dict[str, list]] = None):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._dirs: Dict[str, list] = dirs or {}
+        self._fresh: Dict[str, list] = {}
+        self._visited: Set[str] = set()
+        self._started_ns = time.time_ns()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path) -> "DirCache":
+        """Load the cache file; a missing, corrupt or outdated file starts empty."""
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("version") == CACHE_VERSION:
+                return cls(path, data["dirs"])
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+        return cls(path)
+
+    def listing(self, directory: str) -> List[Tuple[str, str]]:
+        mtime_ns = os.stat(directory).st_mtime_ns
+        cached = self._dirs.get(directory)
+        hit = cached is not None and cached[0] == mtime_ns
+        listing = cached[1] if hit else read_listing(directory)
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._visited.add(directory)
+            if mtime_ns < self._started_ns - self.racy_window_ns:
+                self._fresh[directory] = [mtime_ns, listing]
+        if hit:
+            profiler.count("dir cache hits")
+            profiler.count("syscalls avoided")  # the directory read
+        else:
+            profiler.count("directories read")
+        return listing
+
+    def save(self) -> None:
+        """Write back this run's listings plus untouched parts of the old cache.
+
+        Old entries below a directory visited this run are dropped unless they
+        were visited too, which forgets deleted and newly excluded subtrees.
+        """
+        dirs: Dict[str, list] = {}
+        for directory, record in self._dirs.items():
+            if directory in self._visited:
+                continue
+            parent = os.path.dirname(directory)
+            while parent not in self._visited and os.path.dirname(parent) != parent:
+                parent = os.path.dirname(parent)
+            if parent not in self._visited:
+                dirs[directory] = record
+        dirs.update(self._fresh)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f".{self.path.name}.tmp")
+        temp_path.write_text(json.dumps({"version": CACHE_VERSION, "dirs": dirs}, separators=(",", ":")), encoding="utf-8")
+        os.replace(temp_path, self.path)
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"{self.hits}/{total} directories served from cache ({rate:.1%} hit rate)"
+
+
+class PathListing:
+    """Directory listings synthesized from a flat list of root-relative file paths.
+
+    Lets the tree be rendered from another enumeration, such as the git
+    index, without touching the filesystem; TreeScanner accepts it wherever
+    it takes a DirCache since both only need ``listing()``.
+    """
+
+    def __init__(self, root: Path, rel_paths: Iterable[str]):
+        self.root = str(root)
+        self.file_count = 0
+        self._dirs: Dict[str, Dict[str, str]] = {self.root: {}}
+        for rel_path in rel_paths:
+            parent = self.root
+            *dir_names, file_name = rel_path.split("/")
+            for dir_name in dir_names:
+                self._dirs.setdefault(parent, {})[dir_name] = DIR_KIND
+                parent = os.path.join(parent, dir_name)
+            self._dirs.setdefault(parent, {})[file_name] = FILE_KIND
+            self.file_count += 1
+
+    def listing(self, directory: str) -> List[Tuple[str, str]]:
+        profiler.count("syscalls avoided")  # the directory read
+        return list(self._dirs.get(directory, {}).items())
+
+
+ListingSource = Union[DirCache, PathListing]
+
+
+def scan_dir(
+    directory: str,
+    rel_dir: str,
+    show_hidden: bool,
+    exclude: ExcludeMatcher,
+    with_sizes: bool,
+    cache: Optional[ListingSource] = None,
+    stat_limit: Optional[int] = None,
+) -> List[TreeEntry]:
+    """Return a directory's visible entries, directories first.
+
+    The directory is read at most once (not at all on a cache hit); with
+    ``with_sizes`` each file costs one stat, which also supplies its mtime.
+    Only the first ``stat_limit`` entries are stat'ed when the caller will
+    not show the rest. Unreadable directories are rendered empty.
+    """
+    try:
+        if cache is not None:
+            listing = cache.listing(directory)
+        else:
+            listing = read_listing(directory)
+            profiler.count("directories read")
+    except PermissionError:
+        return []
+    keyed: List[Tuple[bool, str, str, bool]] = []
+    rel_prefix = f"{rel_dir}/" if rel_dir else ""
+    for name, kind in listing:
+        if not show_hidden and name.startswith("."):
+            continue
+        is_dir = kind == DIR_KIND
+        if exclude and exclude.matches(rel_prefix + name, is_dir):
+            continue
+        keyed.append((not is_dir, name.lower(), name, is_dir))
+    keyed.sort(key=lambda item: (item[0], item[1]))
+
+    entries: List[TreeEntry] = []
+    for idx, (_, _, name, is_dir) in enumerate(keyed):
+        path = os.path.join(directory, name)
+        size: Optional[int] = None
+        mtime: Optional[float] = None
+        if with_sizes and not is_dir and (stat_limit is None or idx < stat_limit):
+            try:
+                st = os.stat(path)
+                size, mtime = st.st_size, st.st_mtime
+            except OSError:
+                pass
+        entries.append(TreeEntry(name, path, is_dir, size, mtime))
+    profiler.count("entries walked", len(entries))
+    return entries
+
+
+class TreeScanner:
+    """Scan directories for the renderer, optionally listing ahead on a thread pool.
+
+    With ``jobs > 1`` every scanned directory queues its subdirectories on the
+    pool, so listings are in flight while earlier parts of the tree render.
+    Rendering still consumes results in sorted depth-first order, which keeps
+    the output identical to a serial walk. At most ``window`` listings are
+    held ahead of the renderer; anything beyond that is scanned on demand.
+
+    ``max_depth`` is the deepest directory (include root = 0) the renderer
+    will ask for and ``max_entries`` how many entries per directory it shows;
+    nothing past either limit is stat'ed or listed ahead.
+    """
+
+    def __init__(
+        self,
+        show_hidden: bool,
+        exclude: ExcludeMatcher,
+        with_sizes: bool,
+        jobs: int = 1,
+        cache: Optional[ListingSource] = None,
+        max_depth: Optional[int] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.show_hidden = show_hidden
+        self.exclude = exclude
+        self.with_sizes = with_sizes
+        self.cache = cache
+        self.max_depth = max_depth
+        self.max_entries = max_entries
+        self.window = max(jobs, 1) * 32
+        self._pool = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="tree-scan") if jobs > 1 else None
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def scan(self, path: str, rel_dir: str, depth: int = 0) -> List[TreeEntry]:
+        with self._lock:
+            future = self._pending.pop(path, None)
+        if future is None:
+            return self._scan(path, rel_dir, depth)
+        entries = future.result()
+        # Children skipped while the window was full get queued now
+        self._prefetch(entries, rel_dir, depth)
+        return entries
+
+    def _scan(self, path: str, rel_dir: str, depth: int) -> List[TreeEntry]:
+        entries = scan_dir(
+            path, rel_dir, self.show_hidden, self.exclude, self.with_sizes, self.cache, self.max_entries
+        )
+        self._prefetch(entries, rel_dir, depth)
+        return entries
+
+    def _prefetch(self, entries: List[TreeEntry], rel_dir: str, depth: int) -> None:
+        if self._pool is None or (self.max_depth is not None and depth >= self.max_depth):
+            return
+        with self._lock:
+            for entry in entries[:self.max_entries]:
+                if len(self._pending) >= self.window:
+                    break
+                if entry.is_dir and entry.path not in self._pending:
+                    rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    self._pending[entry.path] = self._pool.submit(self._scan, entry.path, rel_path, depth + 1)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pending.clear()
+
+    def __enter__(self) -> "TreeScanner":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def build_tree(
+    entries: List[TreeEntry],
+    rel_dir: str,
+    prefix: str,
+    scanner: TreeScanner,
+    show_info: bool,
+    max_depth: Optional[int] = None,
+    max_entries: Optional[int] = None,
+    style: TreeStyle = ASCII_STYLE,
+) -> Iterator[str]:
+    """Yield rendered lines for already-scanned entries, depth-first.
+
+    An explicit stack replaces recursion, so only the listings along the
+    current path are alive and each line is produced without copying the
+    lines of the subtrees below it. Directories at ``max_depth`` are shown
+    but not entered, and directories with more than ``max_entries`` visible
+    entries end in a "… N more" line instead of the rest.
+    """
+    stack = [(entries[:max_entries], iter(enumerate(entries[:max_entries])), len(entries), rel_dir, prefix, 1)]
+    while stack:
+        shown, position, total, rel_dir, prefix, depth = stack[-1]
+        step = next(position, None)
+        if step is None:
+            stack.pop()
+            if total > len(shown):
+                yield f"{prefix}{style.last}… {total - len(shown)} more"
+            continue
+        idx, entry = step
+        is_last = idx == total - 1
+        connector = style.last if is_last else style.branch
+        next_prefix = style.space if is_last else style.pipe
+        rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+
+        if entry.is_dir:
+            descend = max_depth is None or depth < max_depth
+            children = scanner.scan(entry.path, rel_path, depth) if descend or show_info else []
+            if show_info:
+                info = f"[DIR] ({len(children):3d} items) "
+                yield f"{prefix}{connector}{info}{entry.name}/"
+            else:
+                yield f"{prefix}{connector}{entry.name}/"
+            if descend:
+                visible = children[:max_entries]
+                stack.append((visible, iter(enumerate(visible)), len(children), rel_path, prefix + next_prefix, depth + 1))
+        else:
+            if show_info:
+                if entry.size is not None:
+                    info = f"[FILE] {format_size(entry.size)} "
+                    yield f"{prefix}{connector}{info}{entry.name}"
+                else:
+                    yield f"{prefix}{connector}[FILE] (error)   {entry.name}"
+            else:
+                yield f"{prefix}{connector}{entry.name}"
+
+
+def limit_lines(lines: Iterator[str], max_lines: Optional[int], notice: Optional[str] = None) -> Iterator[str]:
+    """Pass through at most ``max_lines`` lines, then stop the walk behind them.
+
+    Closing the underlying generator ends the traversal (and shuts down its
+    scanner) instead of enumerating the rest and discarding it. ``notice``
+    replaces the plain-text truncation line, e.g. for machine-readable output.
+    """
+    if max_lines is None:
+        yield from lines
+        return
+    try:
+        for emitted, line in enumerate(lines):
+            if emitted == max_lines:
+                yield notice if notice is not None else f"… output truncated after {max_lines} lines"
+                return
+            yield line
+    finally:
+        lines.close()
+
+
+def as_matcher(exclude: Union[ExcludeMatcher, Iterable[str]]) -> ExcludeMatcher:
+    """Accept either a compiled matcher or raw patterns."""
+    return exclude if isinstance(exclude, ExcludeMatcher) else ExcludeMatcher(exclude)
+
+
+def resolve_include(root: Path, rel_path: str) -> Tuple[Path, str]:
+    """Return the absolute include target and its POSIX path relative to the root."""
+    target = (root / rel_path).resolve()
+    try:
+        rel_dir = target.relative_to(root.resolve()).as_posix()
+    except ValueError:
+        raise ValueError(f"Include path '{rel_path}' must be inside the root directory")
+    return target, "" if rel_dir == "." else rel_dir
+
+
+def generate_tree(
+    root: Path,
+    include: Iterable[str],
+    show_hidden: bool,
+    exclude: Union[ExcludeMatcher, Iterable[str]],
+    show_info: bool,
+    jobs: int = 1,
+    cache: Optional[ListingSource] = None,
+    max_depth: Optional[int] = None,
+    max_entries: Optional[int] = None,
+    style: TreeStyle = ASCII_STYLE,
+) -> Iterator[str]:
+    """Yield the tree lines for each include path, separated by blank lines."""
+    exclude_matcher = as_matcher(exclude)
+
+    # Directories at the depth limit are only listed when their item count is shown
+    scan_depth = None if max_depth is None else max_depth if show_info else max_depth - 1
+    include_paths = list(include)
+    with TreeScanner(show_hidden, exclude_matcher, show_info, jobs, cache, scan_depth, max_entries) as scanner:
+        for idx, rel_path in enumerate(include_paths):
+            target, rel_dir = resolve_include(root, rel_path)
+
+            if not target.exists():
+                yield f"{rel_path} (missing)"
+            elif target.is_dir():
+                entries = scanner.scan(str(target), rel_dir) if max_depth != 0 or show_info else []
+                if show_info:
+                    info = f"[DIR] ({len(entries):3d} items) "
+                    yield f"{info}{rel_path.rstrip('/')}/"
+                else:
+                    yield f"{rel_path.rstrip('/')}/"
+                if max_depth != 0:
+                    yield from build_tree(
+                        entries,
+                        rel_dir=rel_dir,
+                        prefix="",
+                        scanner=scanner,
+                        show_info=show_info,
+                        max_depth=max_depth,
+                        max_entries=max_entries,
+                        style=style,
+                    )
+            else:
+                if show_info:
+                    try:
+                        size = target.stat().st_size
+                        size_str = format_size(size)
+                        info = f"[FILE] {size_str} "
+                        yield f"{info}{rel_path.rstrip('/')}"
+                    except OSError:
+                        yield f"[FILE] (error)   {rel_path.rstrip('/')}"
+                else:
+                    yield rel_path.rstrip('/')
+
+            if idx != len(include_paths) - 1:
+                yield ""
+
+
+def walk_nodes(
+    root: Path,
+    include: Iterable[str],
+    show_hidden: bool,
+    exclude: Union[ExcludeMatcher, Iterable[str]],
+    jobs: int = 1,
+    cache: Optional[ListingSource] = None,
+    max_depth: Optional[int] = None,
+    max_entries: Optional[int] = None,
+) -> Iterator[Tuple[str, dict, bool]]:
+    """Yield ``(event, node, is_last)`` for every entry under the include paths.
+
+    Directories produce an ``enter`` event before their children and an
+    ``exit`` event after them; files produce one ``leaf`` event. Recursive
+    totals are summed into each directory's node as its children finish, so
+    the ``exit`` node carries final ``total_size``/``total_files``/
+    ``total_dirs`` without a second pass over the tree.
+
+    Each directory also gets a ``fingerprint``: an order-independent sum of
+    hashes over every entry's name, size and mtime below it, so two subtrees
+    with equal fingerprints can be treated as identical without comparing
+    their contents (see ``diff_trees``).
+
+    Limits work as in the markdown tree: directories at ``max_depth`` are
+    marked ``truncated`` and not entered, and directories with more than
+    ``max_entries`` entries record the rest as ``omitted``. Totals only cover
+    what was walked.
+    """
+    exclude_matcher = as_matcher(exclude)
+    include_paths = list(include)
+    with TreeScanner(show_hidden, exclude_matcher, True, jobs, cache, max_depth, max_entries) as scanner:
+        for idx, rel_path in enumerate(include_paths):
+            is_last_root = idx == len(include_paths) - 1
+            target, rel_dir = resolve_include(root, rel_path)
+            try:
+                st = os.stat(target)
+            except OSError:
+                yield "leaf", {"name": target.name, "path": rel_dir, "type": "missing"}, is_last_root
+                continue
+            if not S_ISDIR(st.st_mode):
+                node = {"name": target.name, "path": rel_dir, "type": "file", "size": st.st_size, "mtime": st.st_mtime}
+                yield "leaf", node, is_last_root
+                continue
+
+            entries = scanner.scan(str(target), rel_dir)
+            node = _dir_node(target.name, rel_dir, st.st_mtime, entries, max_entries, max_depth == 0)
+            yield "enter", node, is_last_root
+            # Each frame: node, children to walk, position, is_last, depth of the children
+            shown = [] if max_depth == 0 else entries[:max_entries]
+            stack = [(node, shown, iter(enumerate(shown)), is_last_root, 1)]
+            while stack:
+                node, children, position, is_last, depth = stack[-1]
+                step = next(position, None)
+                if step is None:
+                    stack.pop()
+                    node["fingerprint"] = f"{node['fingerprint']:016x}"
+                    yield "exit", node, is_last
+                    if stack:
+                        parent = stack[-1][0]
+                        parent["total_size"] += node["total_size"]
+                        parent["total_files"] += node["total_files"]
+                        parent["total_dirs"] += node["total_dirs"] + 1
+                        parent["fingerprint"] += _entry_digest(f"{node['name']}/", node["fingerprint"], None)
+                        parent["fingerprint"] &= FINGERPRINT_MASK
+                    continue
+                child_idx, entry = step
+                child_is_last = child_idx == len(children) - 1
+                child_rel = f"{node['path']}/{entry.name}" if node["path"] else entry.name
+                if entry.is_dir:
+                    grandchildren = scanner.scan(entry.path, child_rel, depth)
+                    try:
+                        mtime: Optional[float] = os.stat(entry.path).st_mtime
+                    except OSError:
+                        mtime = None
+                    at_limit = max_depth is not None and depth >= max_depth
+                    child = _dir_node(entry.name, child_rel, mtime, grandchildren, max_entries, at_limit)
+                    yield "enter", child, child_is_last
+                    walked = [] if at_limit else grandchildren[:max_entries]
+                    stack.append((child, walked, iter(enumerate(walked)), child_is_last, depth + 1))
+                else:
+                    leaf = {"name": entry.name, "path": child_rel, "type": "file", "size": entry.size, "mtime": entry.mtime}
+                    node["total_size"] += entry.size or 0
+                    node["total_files"] += 1
+                    node["fingerprint"] = (node["fingerprint"] + _entry_digest(entry.name, entry.size, entry.mtime)) & FINGERPRINT_MASK
+                    yield "leaf", leaf, child_is_last
+
+
+TOTAL_KEYS = ("total_size", "total_files", "total_dirs", "fingerprint")
+FINGERPRINT_MASK = (1 << 64) - 1
+
+
+def _entry_digest(name: str, size: object, mtime: Optional[float]) -> int:
+    data = f"{name}\0{size}\0{mtime!r}".encode("utf-8", "surrogateescape")
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+def _dir_node(
+    name: str,
+    rel_path: str,
+    mtime: Optional[float],
+    entries: List[TreeEntry],
+    max_entries: Optional[int],
+    truncated: bool,
+) -> dict:
+    node = {"name": name, "path": rel_path, "type": "dir", "mtime": mtime, "child_count": len(entries)}
+    if truncated:
+        node["truncated"] = True
+    elif max_entries is not None and len(entries) > max_entries:
+        node["omitted"] = len(entries) - max_entries
+    node.update(dict.fromkeys(TOTAL_KEYS, 0))
+    return node
+
+
+def render_json(events: Iterable[Tuple[str, dict, bool]], meta: dict) -> Iterator[str]:
+    """Stream a single JSON document, one node per line.
+
+    A directory's totals are written after its ``children`` array, when they
+    are known, so nothing but the current path has to be held in memory.
+    """
+    head = json.dumps(meta)[:-1]
+    yield f'{head}, "trees": ['
+    depth = 1
+    for event, node, is_last in events:
+        indent = "  " * depth
+        comma = "" if is_last else ","
+        if event == "enter":
+            fields = {key: value for key, value in node.items() if key not in TOTAL_KEYS}
+            yield f'{indent}{json.dumps(fields)[:-1]}, "children": ['
+            depth += 1
+        elif event == "exit":
+            depth -= 1
+            indent = "  " * depth
+            totals = {key: node[key] for key in TOTAL_KEYS}
+            yield f"{indent}], {json.dumps(totals)[1:]}{comma}"
+        else:
+            yield f"{indent}{json.dumps(node)}{comma}"
+    yield "]}"
+
+
+def render_ndjson(events: Iterable[Tuple[str, dict, bool]]) -> Iterator[str]:
+    """Emit one JSON object per entry in post-order, so directories carry final totals."""
+    for event, node, _ in events:
+        if event != "enter":
+            yield json.dumps(node)
+
+
+def ndjson_truncated(max_lines: int) -> str:
+    """The record that ends an ndjson export cut short by ``--max-total-lines``."""
+    return json.dumps({"type": "truncated", "after": max_lines})
+
+
+def collect_nodes(events: Iterable[Tuple[str, dict, bool]]) -> Dict[str, dict]:
+    """Materialize walk_nodes events into nested nodes keyed by include path.
+
+    Directory nodes get a ``children`` dict keyed by entry name.
+    """
+    roots: Dict[str, dict] = {}
+    stack: List[dict] = []
+    for event, node, _ in events:
+        if event == "exit":
+            stack.pop()
+            continue
+        if stack:
+            stack[-1]["children"][node["name"]] = node
+        else:
+            roots[node["path"]] = node
+        if event == "enter":
+            node["children"] = {}
+            stack.append(node)
+    return roots
+
+
+def load_snapshot(path: Path) -> Dict[str, dict]:
+    """Load a ``--format json`` or ``ndjson`` export into the collect_nodes shape."""
+    text = path.read_text(encoding="utf-8")
+    try:
+        trees = json.loads(text)["trees"]
+    except (ValueError, KeyError, TypeError):
+        trees = None
+
+    if trees is not None:
+        pending = list(trees)
+        while pending:
+            node = pending.pop()
+            if node.get("type") == "dir":
+                children = node.get("children", [])
+                pending.extend(children)
+                node["children"] = {child["name"]: child for child in children}
+        return {tree["path"]: tree for tree in trees}
+
+    by_path: Dict[str, dict] = {}
+    for line in text.splitlines():
+        if line.strip():
+            node = json.loads(line)
+            if node.get("type") == "truncated":
+                continue
+            if node.get("type") == "dir":
+                node["children"] = {}
+            by_path[node["path"]] = node
+
+    # Post-order lists children first, so link them up once everything is loaded
+    roots: Dict[str, dict] = {}
+    for node_path, node in by_path.items():
+        parent = by_path.get(node_path.rpartition("/")[0]) if node_path else None
+        if parent is not None and parent.get("type") == "dir":
+            parent["children"][node["name"]] = node
+        else:
+            roots[node_path] = node
+    return roots
+
+
+class TreeChange(NamedTuple):
+    """One added ('+'), removed ('-') or modified ('~') entry in a tree diff."""
+
+    mark: str
+    name: str
+    is_dir: bool
+    delta: int
+    children: List["TreeChange"]
+    note: str = ""
+
+
+def _node_size(node: dict) -> int:
+    if node.get("type") == "dir":
+        return node.get("total_size") or 0
+    return node.get("size") or 0
+
+
+def _whole(mark: str, name: str, node: dict) -> TreeChange:
+    is_dir = node.get("type") == "dir"
+    size = _node_size(node)
+    note = f", {node.get('total_files', 0)} files" if is_dir else ""
+    return TreeChange(mark, name, is_dir, size if mark == "+" else -size, [], note)
+
+
+def diff_children(old: Dict[str, dict], new: Dict[str, dict]) -> List[TreeChange]:
+    """Compare two ``children`` dicts, descending only into subtrees that differ.
+
+    Directories whose fingerprints match are skipped without looking at their
+    contents; files count as modified when their size or mtime changed.
+    """
+    changes: List[TreeChange] = []
+    names = sorted(
+        set(old) | set(new),
+        key=lambda name: ((new.get(name) or old.get(name)).get("type") != "dir", name.lower()),
+    )
+    for name in names:
+        before, after = old.get(name), new.get(name)
+        if before is None:
+            changes.append(_whole("+", name, after))
+        elif after is None:
+            changes.append(_whole("-", name, before))
+        elif (before.get("type") == "dir") != (after.get("type") == "dir"):
+            changes.append(_whole("-", name, before))
+            changes.append(_whole("+", name, after))
+        elif after.get("type") == "dir":
+            if before.get("fingerprint") and before.get("fingerprint") == after.get("fingerprint"):
+                continue
+            nested = diff_children(before.get("children", {}), after.get("children", {}))
+            if nested:
+                changes.append(TreeChange("~", name, True, _node_size(after) - _node_size(before), nested))
+        elif before.get("size") != after.get("size") or before.get("mtime") != after.get("mtime"):
+            changes.append(TreeChange("~", name, False, _node_size(after) - _node_size(before), []))
+    return changes
+
+
+def format_delta(delta: int) -> str:
+    if delta == 0:
+        return "±0B"
+    return ("+" if delta > 0 else "-") + format_size(abs(delta)).strip()
+
+
+def render_changes(changes: List[TreeChange], prefix: str = "", style: TreeStyle = ASCII_STYLE) -> Iterator[str]:
+    for idx, change in enumerate(changes):
+        is_last = idx == len(changes) - 1
+        connector = style.last if is_last else style.branch
+        suffix = "/" if change.is_dir else ""
+        yield f"{prefix}{connector}{change.mark} {change.name}{suffix} ({format_delta(change.delta)}{change.note})"
+        if change.children:
+            yield from render_changes(change.children, prefix + (style.space if is_last else style.pipe), style)
+
+
+def count_changes(changes: List[TreeChange]) -> Dict[str, int]:
+    counts = {"added": 0, "removed": 0, "modified": 0}
+    pending = list(changes)
+    while pending:
+        change = pending.pop()
+        if change.children:
+            pending.extend(change.children)
+        else:
+            counts[{"+": "added", "-": "removed", "~": "modified"}[change.mark]] += 1
+    return counts
+
+
+def diff_trees(old_roots: Dict[str, dict], new_roots: Dict[str, dict], style: TreeStyle = ASCII_STYLE) -> Iterator[str]:
+    """Yield a text tree of what changed from old_roots to new_roots, then a summary line."""
+    totals = {"added": 0, "removed": 0, "modified": 0}
+    paths = list(new_roots) + [path for path in old_roots if path not in new_roots]
+    for idx, path in enumerate(paths):
+        label = path or "."
+        before = {label: old_roots[path]} if path in old_roots and old_roots[path].get("type") != "missing" else {}
+        after = {label: new_roots[path]} if path in new_roots and new_roots[path].get("type") != "missing" else {}
+        changes = diff_children(before, after)
+        if changes:
+            for key, count in count_changes(changes).items():
+                totals[key] += count
+            yield from render_changes(changes, style=style)
+        else:
+            yield f"{label} (unchanged)"
+        if idx != len(paths) - 1:
+            yield ""
+    yield ""
+    yield f"{totals['added']} added, {totals['removed']} removed, {totals['modified']} modified"
+
+
+def write_lines(handle: TextIO, lines: Iterable[str]) -> None:
+    """Write lines as they are produced; the file object does the buffering."""
+    handle.writelines(f"{line}\n" for line in lines)